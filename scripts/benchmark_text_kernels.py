@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from telethon_fancifier.core import text_kernels
+from telethon_fancifier.plugins.random_bold import message_seed, random_bytes
+
+SHORT_MESSAGE = "Привет! Встречаемся в 19:00 у входа, не опаздывай (и возьми зонт)."
+TELEGRAM_MAX_LENGTH = 4096
+BOLD_TABLE = text_kernels.pick_table(0.18)
+
+
+def _long_message() -> str:
+    words = SHORT_MESSAGE.split()
+    rng = random.Random(0)
+    parts: list[str] = []
+    length = 0
+    while length < TELEGRAM_MAX_LENGTH:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:TELEGRAM_MAX_LENGTH]
+
+
+def _words_message() -> str:
+    return ("Привет как дела все хорошо " * 200)[:TELEGRAM_MAX_LENGTH]
+
+
+def _legacy_escape(text: str) -> str:
+    escaped: list[str] = []
+    for ch in text:
+        if ch in text_kernels.MDV2_SPECIAL_CHARS:
+            escaped.append("\\" + ch)
+        else:
+            escaped.append(ch)
+    return "".join(escaped)
+
+
+def _legacy_alternate_case(text: str) -> str:
+    chars: list[str] = []
+    letter_index = 0
+    for ch in text:
+        if ch.isalpha():
+            chars.append(ch.upper() if letter_index % 2 == 1 else ch.lower())
+            letter_index += 1
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def _legacy_bold(text: str, picks: bytes) -> str:
+    result: list[str] = []
+    for index, ch in enumerate(text):
+        if ch.isalpha() and picks[index]:
+            result.append(f"*{ch}*")
+        else:
+            result.append(ch)
+    return "".join(result)
+
+
+def _legacy_random_bold(text: str) -> str:
+    escaped = _legacy_escape(text)
+    result: list[str] = []
+    for ch in escaped:
+        if ch.isalpha() and random.random() < 0.18:
+            result.append(f"*{ch}*")
+        else:
+            result.append(ch)
+    return "".join(result)
+
+
+def _seeded_random_bold(text: str) -> str:
+    escaped = text_kernels.escape_markdown_v2(text)
+    picks = random_bytes(message_seed(1, 1), len(escaped)).translate(BOLD_TABLE)
+    return text_kernels.bold_letters(escaped, picks)
+
+
+def _cases(text: str) -> list[tuple[str, Callable[[], object], Callable[[], object]]]:
+    escaped = text_kernels.escape_markdown_v2(text)
+    picks = random.Random(0).randbytes(len(escaped)).translate(text_kernels.pick_table(0.18))
+    return [
+        (
+            "escape_markdown_v2",
+            lambda: _legacy_escape(text),
+            lambda: text_kernels.escape_markdown_v2(text),
+        ),
+        (
+            "alternate_case",
+            lambda: _legacy_alternate_case(text),
+            lambda: text_kernels.alternate_case(text),
+        ),
+        (
+            "bold_letters",
+            lambda: _legacy_bold(escaped, picks),
+            lambda: text_kernels.bold_letters(escaped, picks),
+        ),
+        (
+            "random_bold",
+            lambda: _legacy_random_bold(text),
+            lambda: _seeded_random_bold(text),
+        ),
+    ]
+
+
+def _best_per_call(func: Callable[[], object], number: int, repeat: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Микробенчмарк текстовых ядер")
+    parser.add_argument("--repeat", type=int, default=5, help="Число повторов замера")
+    args = parser.parse_args()
+
+    print(f"_speedups: {'да' if text_kernels.ACCELERATED else 'нет'}")
+    for label, text, number in (
+        ("короткое сообщение", SHORT_MESSAGE, 20_000),
+        ("слова через пробел", _words_message(), 200),
+        (f"{TELEGRAM_MAX_LENGTH} символов", _long_message(), 200),
+    ):
+        print(f"\n{label} ({len(text)} символов):")
+        for name, legacy, kernel in _cases(text):
+            before = _best_per_call(legacy, number, args.repeat)
+            after = _best_per_call(kernel, number, args.repeat)
+            print(
+                f"  {name:<20} посимвольно {before * 1e6:9.2f} мкс"
+                f"  ядро {after * 1e6:9.2f} мкс  x{before / after:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
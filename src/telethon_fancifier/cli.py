@@ -4,6 +4,7 @@ import argparse
 import asyncio
 import json
 import logging
+import os
 from pathlib import Path
 import sys
 
@@ -11,10 +12,12 @@ from dotenv import load_dotenv
 
 from telethon_fancifier.config.store import ConfigStore
 from telethon_fancifier.core.build_tools import run_windows_portable_build
-from telethon_fancifier.core.daemon import DaemonOptions, FancifierDaemon
+from telethon_fancifier.core.daemon import DaemonOptions, FancifierDaemon, resolve_accounts
 from telethon_fancifier.core.errors import AppError
 from telethon_fancifier.core.llm_tools import preview_llm_response
 from telethon_fancifier.core.logging_setup import configure_logging
+from telethon_fancifier.core.pipeline import run_step
+from telethon_fancifier.core.supervisor import ShardSupervisor
 from telethon_fancifier.core.windows_startup import (
     get_startup_task_status,
     install_startup_task,
@@ -23,11 +26,52 @@ from telethon_fancifier.core.windows_startup import (
 from telethon_fancifier.plugins import build_builtin_registry
 from telethon_fancifier.plugins.base import PluginContext
 from telethon_fancifier.plugins.loader import load_external_plugins
+from telethon_fancifier.plugins.registry import PluginRegistry
 from telethon_fancifier.ui.settings_cli import run_remove_chats_wizard, run_settings_wizard
 
 logger = logging.getLogger(__name__)
 
 
+async def _run_preview(
+    registry: PluginRegistry, plugin_ids: list[str], text: str, chat_id: int
+) -> str:
+    """Пошаговый прогон для preview тем же исполнителем шагов, что и в демоне."""
+    context = PluginContext(chat_id=chat_id, message_id=0, dry_run=True)
+    transformed = text
+    try:
+        for i, plugin_id in enumerate(plugin_ids, 1):
+            try:
+                plugin = registry.get(plugin_id)
+                prev_text = transformed
+                transformed = await run_step(plugin, prev_text, context)
+
+                print(f"\n{'='*60}")
+                print(f"Шаг {i}: {plugin.title} ({plugin_id})")
+                print(f"{'='*60}")
+                if transformed != prev_text:
+                    print(transformed)
+                else:
+                    print("[без изменений]")
+
+            except Exception as exc:
+                print(f"\n{'='*60}")
+                print(f"Шаг {i}: {plugin_id} - ОШИБКА")
+                print(f"{'='*60}")
+                print(f"{exc}")
+                break
+    finally:
+        # Как и демон, закрываем соединения модулей (HTTP-пул LLM) до закрытия цикла
+        for plugin in registry.all():
+            aclose = getattr(plugin, "aclose", None)
+            if not callable(aclose):
+                continue
+            try:
+                await aclose()
+            except Exception:
+                logger.exception("[plugin-error] %s.aclose", plugin.plugin_id)
+    return transformed
+
+
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="telethon-fancifier",
@@ -46,6 +90,30 @@ def _build_parser() -> argparse.ArgumentParser:
     run_parser = subparsers.add_parser("run", help="Запуск демона")
     run_parser.add_argument("--dry-run", action="store_true", help="Показать изменения без редактирования")
     run_parser.add_argument("--no-hot-reload", action="store_true", help="Отключить автоматическую перезагрузку конфига")
+    run_parser.add_argument(
+        "--account",
+        action="append",
+        dest="accounts",
+        metavar="SESSION",
+        help="Запустить только указанные аккаунты из секции accounts (можно повторять)",
+    )
+
+    supervise_parser = subparsers.add_parser(
+        "supervise",
+        help="Запуск аккаунтов из конфига в нескольких процессах-воркерах",
+    )
+    supervise_parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Число процессов-воркеров"
+    )
+    supervise_parser.add_argument("--dry-run", action="store_true", help="Показать изменения без редактирования")
+    supervise_parser.add_argument("--no-hot-reload", action="store_true", help="Отключить автоматическую перезагрузку конфига")
+    supervise_parser.add_argument(
+        "--account",
+        action="append",
+        dest="accounts",
+        metavar="SESSION",
+        help="Запустить только указанные аккаунты из секции accounts (можно повторять)",
+    )
 
     preview_parser = subparsers.add_parser(
         "preview",
@@ -128,7 +196,6 @@ def main() -> None:
     
     # Set portable mode environment variable if flag is set
     if args.portable:
-        import os
         os.environ["TELETHON_FANCIFIER_PORTABLE"] = "1"
     
     log_path = configure_logging()
@@ -137,7 +204,15 @@ def main() -> None:
     try:
         external_plugins_dir = Path("plugins")
         
-        if args.command in {"setup", "remove-chats", "show-config", "run", "test-llm", "preview"}:
+        if args.command in {
+            "setup",
+            "remove-chats",
+            "show-config",
+            "run",
+            "supervise",
+            "test-llm",
+            "preview",
+        }:
             store = ConfigStore()
             config = store.load()
 
@@ -175,6 +250,10 @@ def main() -> None:
                         for name, prompt in config.llm.prompts.items()
                     },
                 },
+                "accounts": [
+                    {"session_name": a.session_name, "chat_ids": a.chat_ids}
+                    for a in config.accounts
+                ],
                 "chats": [
                     {
                         "chat_id": c.chat_id,
@@ -195,10 +274,23 @@ def main() -> None:
                 options=DaemonOptions(dry_run=bool(args.dry_run or config.default_dry_run)),
                 external_plugins_dir=external_plugins_dir,
                 enable_hot_reload=not args.no_hot_reload,
+                accounts=resolve_accounts(config, args.accounts),
             )
             asyncio.run(daemon.run())
             return
 
+        if args.command == "supervise":
+            supervisor = ShardSupervisor(
+                accounts=resolve_accounts(config, args.accounts),
+                workers=args.workers,
+                options=DaemonOptions(dry_run=bool(args.dry_run or config.default_dry_run)),
+                config_path=store.path,
+                external_plugins_dir=external_plugins_dir.resolve(),
+                enable_hot_reload=not args.no_hot_reload,
+            )
+            asyncio.run(supervisor.run())
+            return
+
         if args.command == "preview":
             source_text = args.text if args.text is not None else input("Введите текст: ").strip()
             
@@ -225,36 +317,9 @@ def main() -> None:
             print(f"{'='*60}")
             print(source_text)
             
-            transformed = source_text
-            for i, plugin_id in enumerate(plugin_ids, 1):
-                try:
-                    plugin = registry.get(plugin_id)
-                    prev_text = transformed
-                    transformed = asyncio.run(
-                        plugin.transform(
-                            transformed,
-                            PluginContext(
-                                chat_id=args.chat_id if args.chat_id else 0,
-                                message_id=0,
-                                dry_run=True,
-                            ),
-                        )
-                    )
-                    
-                    print(f"\n{'='*60}")
-                    print(f"Шаг {i}: {plugin.title} ({plugin_id})")
-                    print(f"{'='*60}")
-                    if transformed != prev_text:
-                        print(transformed)
-                    else:
-                        print("[без изменений]")
-                        
-                except Exception as exc:
-                    print(f"\n{'='*60}")
-                    print(f"Шаг {i}: {plugin_id} - ОШИБКА")
-                    print(f"{'='*60}")
-                    print(f"{exc}")
-                    break
+            transformed = asyncio.run(
+                _run_preview(registry, plugin_ids, source_text, args.chat_id or 0)
+            )
             
             print(f"\n{'='*60}")
             print("Финальный результат:")
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from telethon_fancifier.config.schema import AppConfig, ChatConfig
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigDiff:
+    """Структурная разница двух версий ``AppConfig``."""
+
+    added_chats: frozenset[int] = frozenset()
+    removed_chats: frozenset[int] = frozenset()
+    changed_chats: frozenset[int] = frozenset()
+    llm_changed: bool = False
+    prompts_changed: frozenset[str] = frozenset()
+    runtime_changed: bool = False
+    accounts_changed: bool = False
+    general_changed: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not (
+            self.added_chats
+            or self.removed_chats
+            or self.changed_chats
+            or self.llm_changed
+            or self.runtime_changed
+            or self.accounts_changed
+            or self.general_changed
+        )
+
+    @property
+    def rebuild_chats(self) -> frozenset[int]:
+        return self.added_chats | self.changed_chats
+
+    def summary(self) -> str:
+        parts: list[str] = []
+        if self.added_chats:
+            parts.append(f"чаты +{len(self.added_chats)}")
+        if self.removed_chats:
+            parts.append(f"чаты -{len(self.removed_chats)}")
+        if self.changed_chats:
+            parts.append(f"чаты ~{len(self.changed_chats)}")
+        if self.llm_changed:
+            prompts = f" (промпты: {', '.join(sorted(self.prompts_changed))})" if self.prompts_changed else ""
+            parts.append(f"LLM{prompts}")
+        if self.runtime_changed:
+            parts.append("runtime")
+        if self.accounts_changed:
+            parts.append("accounts")
+        if self.general_changed:
+            parts.append("общие настройки")
+        return ", ".join(parts) or "без изменений"
+
+
+# Секции, изменения которых применяются только после перезапуска демона
+_RESTART_SECTIONS = (
+    "runtime",
+    "http",
+    "llm_cache",
+    "hedging",
+    "resilience",
+    "batching",
+    "random_bold",
+)
+
+
+def _chats_by_id(chats: list[ChatConfig]) -> dict[int, ChatConfig]:
+    # Как и при компиляции конвейеров, действует первое вхождение chat_id
+    result: dict[int, ChatConfig] = {}
+    for chat in chats:
+        result.setdefault(chat.chat_id, chat)
+    return result
+
+
+def diff_configs(old: AppConfig, new: AppConfig) -> ConfigDiff:
+    old_chats = _chats_by_id(old.chats)
+    new_chats = _chats_by_id(new.chats)
+
+    old_prompts = old.llm.prompts
+    new_prompts = new.llm.prompts
+    prompts_changed = frozenset(
+        name
+        for name in old_prompts.keys() | new_prompts.keys()
+        if old_prompts.get(name) != new_prompts.get(name)
+    )
+
+    return ConfigDiff(
+        added_chats=frozenset(new_chats.keys() - old_chats.keys()),
+        removed_chats=frozenset(old_chats.keys() - new_chats.keys()),
+        changed_chats=frozenset(
+            chat_id
+            for chat_id in old_chats.keys() & new_chats.keys()
+            if old_chats[chat_id] != new_chats[chat_id]
+        ),
+        llm_changed=old.llm != new.llm,
+        prompts_changed=prompts_changed,
+        runtime_changed=any(
+            getattr(old, section) != getattr(new, section) for section in _RESTART_SECTIONS
+        ),
+        accounts_changed=old.accounts != new.accounts,
+        general_changed=(
+            old.schema_version != new.schema_version
+            or old.parse_mode != new.parse_mode
+            or old.default_dry_run != new.default_dry_run
+        ),
+    )
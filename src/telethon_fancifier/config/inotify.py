@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+# Атомарная запись (tmp + rename) приходит как IN_MOVED_TO, обычная — как IN_CLOSE_WRITE
+DIRECTORY_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+
+
+class InotifyWatch:
+    """Неблокирующий inotify-дескриптор на один каталог (Linux, через ctypes)."""
+
+    def __init__(self, fd: int) -> None:
+        self._fd = fd
+
+    @classmethod
+    def open(cls, directory: Path, mask: int = DIRECTORY_MASK) -> InotifyWatch | None:
+        """Возвращает наблюдение за каталогом или None, если inotify недоступен."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            init1 = libc.inotify_init1
+            add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return None
+
+        add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            logger.warning("inotify_init1 failed: %s", os.strerror(ctypes.get_errno()))
+            return None
+        if add_watch(fd, os.fsencode(directory), mask) < 0:
+            logger.warning(
+                "inotify_add_watch failed for %s: %s", directory, os.strerror(ctypes.get_errno())
+            )
+            os.close(fd)
+            return None
+        return cls(fd)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def read_names(self) -> list[str]:
+        """Вычитывает накопившиеся события и возвращает имена затронутых файлов."""
+        names: list[str] = []
+        while True:
+            try:
+                buffer = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                return names
+            if not buffer:
+                return names
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buffer):
+                _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                raw_name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if raw_name:
+                    names.append(os.fsdecode(raw_name))
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
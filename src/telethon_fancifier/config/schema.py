@@ -56,6 +56,108 @@ class ChatConfig:
     chat_id: int
     title: str
     plugin_order: list[str] = field(default_factory=list)
+    latest_wins: bool = True
+
+
+@dataclass(slots=True)
+class AccountConfig:
+    """Telegram-сессия. Пустой ``chat_ids`` — аккаунт обслуживает все настроенные чаты."""
+
+    session_name: str
+    chat_ids: list[int] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class RuntimeConfig:
+    """Параметры производительности демона."""
+
+    max_workers: int = 4
+    chat_queue_size: int = 8
+    executor_threads: int = 4
+    executor_processes: int = 2
+    edit_rate_per_second: float = 5.0
+    edit_burst: int = 5
+    chat_state_max_entries: int = 10_000
+    # LRU результатов чистых модулей (pure = True) и чистых префиксов цепочек; 0 — выкл.
+    plugin_memo_max_entries: int = 4096
+    # Постепенная правка сообщения по мере стриминга ответа LLM (последний шаг цепочки)
+    stream_partial_edits: bool = False
+    partial_edit_interval_seconds: float = 1.5
+    # Заранее прогонять черновики (UpdateDraftMessage) через цепочку чата, пока идёт набор
+    speculative_drafts: bool = False
+    draft_debounce_seconds: float = 0.8
+    stats_interval_seconds: float = 60.0
+
+
+@dataclass(slots=True)
+class HttpClientConfig:
+    """Пул HTTP-соединений LLM-провайдера."""
+
+    max_connections: int = 10
+    max_keepalive_connections: int = 5
+    keepalive_expiry_seconds: float = 90.0
+    http2: bool = False
+    warmup: bool = True
+    # Пинг после простоя, чтобы соединение не закрылось до следующего сообщения; 0 — выкл.
+    idle_ping_seconds: float = 60.0
+
+
+@dataclass(slots=True)
+class LlmCacheConfig:
+    """Кеш ответов LLM; используется только для детерминированных промптов (temperature=0)."""
+
+    enabled: bool = True
+    max_entries: int = 1000
+    ttl_seconds: float = 7 * 24 * 3600.0
+    # Хранить кеш в SQLite в каталоге данных, чтобы он переживал перезапуск
+    persist: bool = False
+
+
+@dataclass(slots=True)
+class HedgingConfig:
+    """Хеджирование запросов к LLM по нескольким адресам API (первый — основной)."""
+
+    enabled: bool = False
+    base_urls: list[str] = field(default_factory=list)
+    # Резервный запрос уходит, если основной не ответил за этот перцентиль задержки
+    percentile: float = 95.0
+    initial_delay_seconds: float = 2.0
+    min_delay_seconds: float = 0.3
+    max_delay_seconds: float = 5.0
+
+
+@dataclass(slots=True)
+class ResilienceConfig:
+    """Повторы запросов к LLM и размыкатель цепи при деградации API."""
+
+    enabled: bool = True
+    max_attempts: int = 3
+    backoff_base_seconds: float = 0.2
+    backoff_max_seconds: float = 2.0
+    failure_threshold: int = 5
+    open_seconds: float = 30.0
+    half_open_probes: int = 1
+
+
+@dataclass(slots=True)
+class BatchingConfig:
+    """Объединение одинаково настроенных LLM-запросов разных чатов в один."""
+
+    enabled: bool = False
+    window_seconds: float = 0.15
+    max_batch_size: int = 8
+
+
+@dataclass(slots=True)
+class RandomBoldConfig:
+    """Модуль random_bold: доля выделенных букв и зерно генератора.
+
+    Без ``seed`` зерно выводится из ``chat_id:message_id``; заданный ``seed`` смешивается с
+    ними же, так что разные сообщения по-прежнему выделяются по-разному.
+    """
+
+    probability: float = 0.18
+    seed: int | None = None
 
 
 @dataclass(slots=True)
@@ -65,3 +167,11 @@ class AppConfig:
     default_dry_run: bool = False
     chats: list[ChatConfig] = field(default_factory=list)
     llm: LlmConfig = field(default_factory=LlmConfig)
+    runtime: RuntimeConfig = field(default_factory=RuntimeConfig)
+    http: HttpClientConfig = field(default_factory=HttpClientConfig)
+    llm_cache: LlmCacheConfig = field(default_factory=LlmCacheConfig)
+    hedging: HedgingConfig = field(default_factory=HedgingConfig)
+    resilience: ResilienceConfig = field(default_factory=ResilienceConfig)
+    batching: BatchingConfig = field(default_factory=BatchingConfig)
+    random_bold: RandomBoldConfig = field(default_factory=RandomBoldConfig)
+    accounts: list[AccountConfig] = field(default_factory=list)
@@ -1,65 +1,227 @@
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
-from dataclasses import asdict
+import os
+import shutil
+import tempfile
+from dataclasses import asdict, fields
 from json import JSONDecodeError
 import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from telethon_fancifier.config.paths import get_config_path
-from telethon_fancifier.config.schema import AppConfig, ChatConfig, LlmConfig, LlmPromptConfig
+from telethon_fancifier.config.schema import (
+    AccountConfig,
+    AppConfig,
+    BatchingConfig,
+    ChatConfig,
+    HedgingConfig,
+    HttpClientConfig,
+    LlmCacheConfig,
+    LlmConfig,
+    LlmPromptConfig,
+    RandomBoldConfig,
+    ResilienceConfig,
+    RuntimeConfig,
+)
 from telethon_fancifier.core.errors import AppError
 
+if TYPE_CHECKING:
+    from _typeshed import DataclassInstance
+
 logger = logging.getLogger(__name__)
 
+# Служебные поля файла: не часть AppConfig и не входят в хеш содержимого
+_STAMP_KEYS = ("generation", "content_hash")
+
+_StatKey = tuple[int, int, int]
+
+
+def config_content_hash(payload: dict[str, Any]) -> str:
+    """SHA-256 канонического JSON конфига без служебных полей."""
+    body = {key: value for key, value in payload.items() if key not in _STAMP_KEYS}
+    canonical = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _apply_target_mode(target: Path, tmp_name: str) -> None:
+    """Права временного файла как у конфига: mkstemp создаёт 0600, и os.replace их сохранит."""
+    try:
+        shutil.copymode(target, tmp_name)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_name, 0o666 & ~umask)
+
+
+def _load_section[T: DataclassInstance](cls: type[T], payload: Any) -> T:
+    """Собирает dataclass-секцию из известных ключей, приводя типы к значениям по умолчанию."""
+    defaults = cls()
+    if not isinstance(payload, dict):
+        return defaults
+    values: dict[str, Any] = {}
+    for item in fields(cls):
+        if item.name not in payload:
+            continue
+        default = getattr(defaults, item.name)
+        raw = payload[item.name]
+        if raw is None or default is None or isinstance(default, (list, dict)):
+            values[item.name] = raw
+        else:
+            values[item.name] = type(default)(raw)
+    return cls(**values)
+
 
 class ConfigStore:
-    def __init__(self) -> None:
-        self._path = get_config_path()
+    """Чтение и атомарная запись конфига.
+
+    Файл пишется через временный файл и ``os.replace``, поэтому читатель никогда не
+    увидит его наполовину записанным. В файле хранятся ``generation`` (растёт с каждым
+    сохранением) и ``content_hash``; сохранение без изменений файл не трогает. ``load``
+    кеширует разобранный конфиг и не разбирает файл повторно, пока он не изменился.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self._path = path if path is not None else get_config_path()
+        self._cache: tuple[_StatKey, str, int, AppConfig] | None = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def generation(self) -> int:
+        """Поколение последнего прочитанного или записанного файла (0 — не было)."""
+        return self._cache[2] if self._cache is not None else 0
+
+    def revision(self) -> _StatKey | None:
+        """Дешёвый признак версии файла (mtime, размер, inode) без чтения содержимого."""
+        try:
+            stat = self._path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
 
     def load(self) -> AppConfig:
-        if not self._path.exists():
+        revision = self.revision()
+        if revision is None:
             return AppConfig()
+        cache = self._cache
+        if cache is not None and cache[0] == revision:
+            return copy.deepcopy(cache[3])
         try:
-            payload = json.loads(self._path.read_text(encoding="utf-8"))
-            chats = [ChatConfig(**item) for item in payload.get("chats", [])]
-            llm_payload = payload.get("llm", {})
-            prompts_payload = llm_payload.get("prompts", {})
-            prompts: dict[str, LlmPromptConfig] = {}
-            for name, prompt_payload in prompts_payload.items():
-                prompts[name] = LlmPromptConfig(
-                    system_prompt=str(prompt_payload.get("system_prompt", "")),
-                    user_prompt_template=str(prompt_payload.get("user_prompt_template", "{text}")),
-                    temperature=float(prompt_payload.get("temperature", 0.0)),
-                )
-
-            llm = LlmConfig(
-                provider=str(llm_payload.get("provider", "deepseek")),
-                model=str(llm_payload.get("model", "deepseek-chat")),
-                api_style=str(llm_payload.get("api_style", "chat_completions")),
-                active_prompt=str(llm_payload.get("active_prompt", "emoji_mirror")),
-                prompts=prompts,
-            )
-            llm.get_active_prompt()
-            return AppConfig(
-                schema_version=payload.get("schema_version", 1),
-                parse_mode=payload.get("parse_mode", "markdown_v2"),
-                default_dry_run=payload.get("default_dry_run", False),
-                chats=chats,
-                llm=llm,
-            )
-        except (OSError, JSONDecodeError, TypeError, ValueError) as exc:
+            raw = self._path.read_bytes()
+            raw_hash = hashlib.sha256(raw).hexdigest()
+            if cache is not None and cache[1] == raw_hash:
+                self._cache = (revision, raw_hash, cache[2], cache[3])
+                return copy.deepcopy(cache[3])
+            payload = json.loads(raw.decode("utf-8"))
+            config = self._parse(payload)
+            generation = int(payload.get("generation", 0))
+        except (OSError, JSONDecodeError, UnicodeDecodeError, TypeError, ValueError) as exc:
             logger.exception("Ошибка чтения конфига: %s", self._path)
             raise AppError(
                 "Не удалось прочитать конфиг. Проверьте корректность файла и попробуйте снова."
             ) from exc
+        self._cache = (revision, raw_hash, generation, config)
+        return copy.deepcopy(config)
+
+    @staticmethod
+    def _parse(payload: dict[str, Any]) -> AppConfig:
+        chats = [ChatConfig(**item) for item in payload.get("chats", [])]
+        llm_payload = payload.get("llm", {})
+        prompts_payload = llm_payload.get("prompts", {})
+        prompts: dict[str, LlmPromptConfig] = {}
+        for name, prompt_payload in prompts_payload.items():
+            prompts[name] = LlmPromptConfig(
+                system_prompt=str(prompt_payload.get("system_prompt", "")),
+                user_prompt_template=str(prompt_payload.get("user_prompt_template", "{text}")),
+                temperature=float(prompt_payload.get("temperature", 0.0)),
+            )
+
+        llm = LlmConfig(
+            provider=str(llm_payload.get("provider", "deepseek")),
+            model=str(llm_payload.get("model", "deepseek-chat")),
+            api_style=str(llm_payload.get("api_style", "chat_completions")),
+            active_prompt=str(llm_payload.get("active_prompt", "emoji_mirror")),
+            prompts=prompts,
+        )
+        llm.get_active_prompt()
+        return AppConfig(
+            schema_version=payload.get("schema_version", 1),
+            parse_mode=payload.get("parse_mode", "markdown_v2"),
+            default_dry_run=payload.get("default_dry_run", False),
+            chats=chats,
+            llm=llm,
+            runtime=_load_section(RuntimeConfig, payload.get("runtime")),
+            http=_load_section(HttpClientConfig, payload.get("http")),
+            llm_cache=_load_section(LlmCacheConfig, payload.get("llm_cache")),
+            hedging=_load_section(HedgingConfig, payload.get("hedging")),
+            resilience=_load_section(ResilienceConfig, payload.get("resilience")),
+            batching=_load_section(BatchingConfig, payload.get("batching")),
+            random_bold=_load_section(RandomBoldConfig, payload.get("random_bold")),
+            accounts=[AccountConfig(**item) for item in payload.get("accounts", [])],
+        )
 
     def save(self, config: AppConfig) -> None:
+        """Атомарно сохраняет конфиг; если содержимое не изменилось, файл не трогается."""
+        payload: dict[str, Any] = asdict(config)
+        content_hash = config_content_hash(payload)
+        previous_hash, previous_generation = self._current_stamp()
+        if content_hash == previous_hash:
+            logger.debug("Конфиг не изменился, запись пропущена: %s", self._path)
+            return
+
+        generation = previous_generation + 1
+        payload["generation"] = generation
+        payload["content_hash"] = content_hash
+        data = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        tmp_name: str | None = None
         try:
             self._path.parent.mkdir(parents=True, exist_ok=True)
-            self._path.write_text(
-                json.dumps(asdict(config), ensure_ascii=False, indent=2),
-                encoding="utf-8",
+            fd, tmp_name = tempfile.mkstemp(
+                dir=self._path.parent, prefix=f".{self._path.name}.", suffix=".tmp"
             )
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+            _apply_target_mode(self._path, tmp_name)
+            os.replace(tmp_name, self._path)
+            tmp_name = None
         except OSError as exc:
             logger.exception("Ошибка сохранения конфига: %s", self._path)
             raise AppError("Не удалось сохранить конфиг на диск.") from exc
+        finally:
+            if tmp_name is not None:
+                Path(tmp_name).unlink(missing_ok=True)
+
+        revision = self.revision()
+        if revision is not None:
+            self._cache = (
+                revision,
+                hashlib.sha256(data).hexdigest(),
+                generation,
+                copy.deepcopy(config),
+            )
+
+    def _current_stamp(self) -> tuple[str | None, int]:
+        """Хеш фактического содержимого файла на диске и его поколение.
+
+        Хеш пересчитывается, а не берётся из файла: после ручной правки записанный
+        ``content_hash`` может быть устаревшим.
+        """
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, JSONDecodeError, UnicodeDecodeError):
+            return None, self.generation
+        if not isinstance(payload, dict):
+            return None, self.generation
+        try:
+            generation = int(payload.get("generation", 0))
+        except (TypeError, ValueError):
+            generation = 0
+        return config_content_hash(payload), max(generation, self.generation)
@@ -1,32 +1,64 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import inspect
 import logging
+from collections.abc import Awaitable, Callable
 from pathlib import Path
-from typing import Callable
+
+from telethon_fancifier.config.inotify import InotifyWatch
 
 logger = logging.getLogger(__name__)
 
+ReloadCallback = Callable[[], Awaitable[None] | None]
+
 
 class ConfigWatcher:
-    """Watches config file for changes and triggers reload callbacks."""
+    """Watches config file for changes and triggers reload callbacks.
+
+    On Linux the config directory is watched through inotify, so atomic renames are
+    seen as well as in-place writes; elsewhere (or if inotify is unavailable) the file
+    is polled with ``stat()``. Bursts of events are debounced, and callbacks only fire
+    when the SHA-256 of the file content actually changed. The file is read and hashed
+    in a worker thread; coroutine callbacks are awaited one after another.
+    """
 
-    def __init__(self, config_path: Path, check_interval: float = 1.0) -> None:
+    def __init__(
+        self,
+        config_path: Path,
+        check_interval: float = 1.0,
+        debounce: float = 0.2,
+        use_inotify: bool = True,
+    ) -> None:
         """
         Initialize config watcher.
-        
+
         Args:
             config_path: Path to config file to watch
-            check_interval: How often to check for changes (seconds)
+            check_interval: How often to check for changes in polling mode (seconds)
+            debounce: Quiet period after the last event before the file is re-read (seconds)
+            use_inotify: Try event-driven watching before falling back to polling
         """
         self._config_path = config_path
         self._check_interval = check_interval
-        self._last_mtime: float | None = None
-        self._callbacks: list[Callable[[], None]] = []
+        self._debounce = debounce
+        self._use_inotify = use_inotify
+        self._last_stat: tuple[int, int, int] | None = None
+        self._last_hash: str | None = None
+        self._callbacks: list[ReloadCallback] = []
         self._task: asyncio.Task[None] | None = None
+        self._check_tasks: set[asyncio.Task[None]] = set()
+        self._check_lock = asyncio.Lock()
+        self._inotify: InotifyWatch | None = None
+        self._debounce_handle: asyncio.TimerHandle | None = None
         self._running = False
 
-    def add_callback(self, callback: Callable[[], None]) -> None:
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def add_callback(self, callback: ReloadCallback) -> None:
         """Register a callback to be called when config changes."""
         self._callbacks.append(callback)
 
@@ -36,54 +68,98 @@ class ConfigWatcher:
             return
 
         self._running = True
-        self._update_mtime()
-        self._task = asyncio.create_task(self._watch_loop())
-        logger.info("Config watcher started for: %s", self._config_path)
+        self._last_stat = self._stat_key()
+        self._last_hash = self._content_hash()
+        if self._use_inotify:
+            self._inotify = InotifyWatch.open(self._config_path.parent)
+        if self._inotify is not None:
+            asyncio.get_running_loop().add_reader(self._inotify.fileno(), self._on_inotify)
+        else:
+            self._task = asyncio.create_task(self._watch_loop())
+        logger.info("Config watcher started for: %s (%s)", self._config_path, self.mode)
 
     async def stop(self) -> None:
         """Stop watching the config file."""
         self._running = False
-        if self._task is not None:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
-            self._task = None
+        if self._debounce_handle is not None:
+            self._debounce_handle.cancel()
+            self._debounce_handle = None
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fileno())
+            self._inotify.close()
+            self._inotify = None
+        tasks = [*self._check_tasks, *([self._task] if self._task is not None else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._check_tasks.clear()
         logger.info("Config watcher stopped")
 
-    def _update_mtime(self) -> None:
-        """Update the last known modification time."""
+    def _stat_key(self) -> tuple[int, int, int] | None:
         try:
-            if self._config_path.exists():
-                self._last_mtime = self._config_path.stat().st_mtime
+            stat = self._config_path.stat()
         except OSError:
-            pass
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _content_hash(self) -> str | None:
+        try:
+            return hashlib.sha256(self._config_path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def _on_inotify(self) -> None:
+        assert self._inotify is not None
+        try:
+            names = self._inotify.read_names()
+        except OSError:
+            logger.exception("Error reading inotify events")
+            return
+        if self._config_path.name not in names:
+            return
+        # Each new event restarts the quiet period: a burst of writes gives one reload
+        if self._debounce_handle is not None:
+            self._debounce_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._debounce_handle = loop.call_later(self._debounce, self._schedule_check)
+
+    def _schedule_check(self) -> None:
+        self._debounce_handle = None
+        if self._running:
+            task = asyncio.create_task(self._check_content())
+            self._check_tasks.add(task)
+            task.add_done_callback(self._check_tasks.discard)
+
+    async def _check_content(self) -> None:
+        # Checks run one at a time: an event during a reload yields one more check after it
+        async with self._check_lock:
+            if not self._running:
+                return
+            current_hash = await asyncio.to_thread(self._content_hash)
+            if current_hash is None or current_hash == self._last_hash:
+                return
+            self._last_hash = current_hash
+            logger.info("Config file changed, triggering reload")
+            await self._notify()
+
+    async def _notify(self) -> None:
+        # Call all registered callbacks
+        for callback in self._callbacks:
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Error in config reload callback")
 
     async def _watch_loop(self) -> None:
-        """Main watch loop that checks for file changes."""
+        """Polling fallback: stat() every interval, hash only when the stat key moved."""
         while self._running:
             await asyncio.sleep(self._check_interval)
-            
-            try:
-                if not self._config_path.exists():
-                    continue
-
-                current_mtime = self._config_path.stat().st_mtime
-                
-                if self._last_mtime is not None and current_mtime > self._last_mtime:
-                    logger.info("Config file changed, triggering reload")
-                    self._last_mtime = current_mtime
-                    
-                    # Call all registered callbacks
-                    for callback in self._callbacks:
-                        try:
-                            callback()
-                        except Exception:
-                            logger.exception("Error in config reload callback")
-                
-                elif self._last_mtime is None:
-                    self._last_mtime = current_mtime
-
-            except OSError:
-                logger.exception("Error checking config file")
+
+            current_stat = self._stat_key()
+            if current_stat is None or current_stat == self._last_stat:
+                continue
+            self._last_stat = current_stat
+            await self._check_content()
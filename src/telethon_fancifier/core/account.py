@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from telethon import TelegramClient, events, utils
+from telethon.tl import types
+
+from telethon_fancifier.config.paths import get_session_dir
+from telethon_fancifier.config.schema import AccountConfig, RuntimeConfig
+from telethon_fancifier.core.chat_state import ChatStateTable
+from telethon_fancifier.core.edit_scheduler import EditScheduler
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.core.partial_edits import PartialEditThrottle
+from telethon_fancifier.core.pipeline import (
+    CompiledPipeline,
+    PipelineResult,
+    PipelineSnapshot,
+    message_independent_length,
+    run_pipeline,
+    sub_pipeline,
+)
+from telethon_fancifier.core.safeguards import (
+    EDIT_WINDOW_SECONDS,
+    can_edit_last_message,
+    edit_deadline,
+)
+from telethon_fancifier.core.speculation import DraftSpeculator
+from telethon_fancifier.core.telegram_credentials import read_telegram_credentials
+from telethon_fancifier.plugins.base import PluginContext
+
+if TYPE_CHECKING:
+    from telethon_fancifier.core.daemon import FancifierDaemon
+
+logger = logging.getLogger(__name__)
+
+ClientFactory = Callable[[AccountConfig], Any]
+
+
+def default_client_factory(account: AccountConfig) -> TelegramClient:
+    credentials = read_telegram_credentials()
+    session_dir = get_session_dir()
+    session_dir.mkdir(parents=True, exist_ok=True)
+    return TelegramClient(
+        str(session_dir / (account.session_name or credentials.session_name)),
+        credentials.api_id,
+        credentials.api_hash,
+    )
+
+
+class AccountRunner:
+    """Одна Telegram-сессия внутри демона: свой клиент, свои чаты, свой лимит правок.
+
+    Реестр модулей, LLM-провайдер, пул воркеров и наблюдатель конфига общие и живут
+    в ``FancifierDaemon``.
+    """
+
+    def __init__(
+        self,
+        daemon: FancifierDaemon,
+        account: AccountConfig,
+        runtime: RuntimeConfig,
+        client_factory: ClientFactory = default_client_factory,
+    ) -> None:
+        self.name = account.session_name
+        self._daemon = daemon
+        self._chat_ids = frozenset(account.chat_ids)
+        self.metrics = Metrics()
+        self._runtime = runtime
+        # Запись живёт вдвое дольше окна правки: запас на задержку очереди и часов
+        self._last_messages = ChatStateTable(
+            max_entries=runtime.chat_state_max_entries,
+            ttl=EDIT_WINDOW_SECONDS * 2,
+        )
+        self._handler_event: events.NewMessage | None = None
+        self._draft_event: events.Raw | None = None
+        self._draft_chat_ids: frozenset[int] = frozenset()
+        self._speculator: DraftSpeculator | None = None
+        self._restores: set[asyncio.Task[None]] = set()
+        if runtime.speculative_drafts:
+            self._speculator = DraftSpeculator(
+                self._speculate,
+                debounce=runtime.draft_debounce_seconds,
+                metrics=self.metrics,
+            )
+        self._client = client_factory(account)
+        self._edit_scheduler = EditScheduler(
+            self._edit_message,
+            rate=runtime.edit_rate_per_second,
+            burst=runtime.edit_burst,
+            metrics=self.metrics,
+        )
+
+    def handles(self, chat_id: int) -> bool:
+        return not self._chat_ids or chat_id in self._chat_ids
+
+    def register_handler(self, snapshot: PipelineSnapshot) -> None:
+        """(Пере)регистрирует обработчик с фильтром по чатам этого аккаунта."""
+        if self._handler_event is not None:
+            self._client.remove_event_handler(self._on_outgoing, self._handler_event)
+
+        chat_ids = frozenset(chat_id for chat_id in snapshot.pipelines if self.handles(chat_id))
+        metrics = self.metrics
+
+        def accepts(event: events.NewMessage.Event) -> bool:
+            if event.chat_id in chat_ids:
+                return True
+            metrics.incr("events.dropped_before_dispatch")
+            return False
+
+        self._handler_event = events.NewMessage(outgoing=True, func=accepts)
+        self._client.add_event_handler(self._on_outgoing, self._handler_event)
+
+        if self._speculator is not None:
+            self._draft_chat_ids = chat_ids
+            if self._draft_event is None:
+                self._draft_event = events.Raw(types.UpdateDraftMessage)
+                self._client.add_event_handler(self._on_draft, self._draft_event)
+
+    async def _on_draft(self, update: types.UpdateDraftMessage) -> None:
+        assert self._speculator is not None
+        chat_id = utils.get_peer_id(update.peer)
+        if chat_id not in self._draft_chat_ids:
+            return
+        pipeline = self._daemon.snapshot.get(chat_id)
+        if pipeline is None or message_independent_length(pipeline) == 0:
+            return
+        # DraftMessageEmpty (черновик очищен) не имеет текста
+        self._speculator.on_draft(chat_id, pipeline, getattr(update.draft, "message", ""))
+
+    async def _speculate(
+        self, pipeline: CompiledPipeline, chat_id: int, text: str
+    ) -> PipelineResult:
+        # Окно правки начнётся только после отправки, так что дедлайн здесь — с запасом
+        context = PluginContext(
+            chat_id=chat_id,
+            message_id=0,
+            dry_run=self._daemon.options.dry_run,
+            deadline=time.monotonic() + EDIT_WINDOW_SECONDS,
+        )
+        # До отправки message_id неизвестен: шаги, зависящие от него, досчитает
+        # _transform_and_edit
+        prefix = sub_pipeline(pipeline, 0, message_independent_length(pipeline))
+        return await run_pipeline(
+            prefix, text, context, self._daemon.executors, self._daemon.plugin_memo
+        )
+
+    async def _on_outgoing(self, event: events.NewMessage.Event) -> None:
+        if event.message is None or event.message.id is None or event.chat_id is None:
+            return
+
+        chat_id = int(event.chat_id)
+        message_id = int(event.message.id)
+        text = event.raw_text or ""
+        if not text:
+            return
+
+        pipeline = self._daemon.snapshot.get(chat_id)
+        if pipeline is None or not self.handles(chat_id):
+            return
+
+        self._last_messages.touch(chat_id, message_id)
+        self.metrics.incr("events.accepted")
+
+        self._daemon.dispatcher.submit(
+            (self.name, chat_id),
+            partial(self._process, pipeline, chat_id, message_id, text, event.message.date),
+            latest_wins=pipeline.latest_wins,
+        )
+
+    async def _process(
+        self,
+        pipeline: CompiledPipeline,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        message_date: datetime,
+    ) -> None:
+        try:
+            await self._transform_and_edit(pipeline, chat_id, message_id, text, message_date)
+        except asyncio.CancelledError:
+            self._skip("superseded", chat_id, message_id, "вытеснено более новым сообщением")
+            raise
+
+    async def _transform_and_edit(
+        self,
+        pipeline: CompiledPipeline,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        message_date: datetime,
+    ) -> None:
+        guard = can_edit_last_message(
+            message_id=message_id,
+            last_message_id=self._last_messages.last_message_id(chat_id),
+            message_date=message_date.astimezone(UTC),
+            max_age_seconds=EDIT_WINDOW_SECONDS,
+        )
+        if not guard.ok:
+            self._skip(guard.code, chat_id, message_id, guard.reason)
+            return
+
+        dry_run = self._daemon.options.dry_run
+        deadline = edit_deadline(message_date, EDIT_WINDOW_SECONDS)
+        source = text
+        rest = pipeline
+        if self._speculator is not None:
+            speculated = await self._speculator.take(chat_id, pipeline, text)
+            if speculated is not None:
+                source = speculated.text
+                rest = sub_pipeline(pipeline, message_independent_length(pipeline))
+        partial: PartialEditThrottle | None = None
+        if self._runtime.stream_partial_edits and not dry_run and rest.plugins:
+            partial = PartialEditThrottle(
+                self._edit_scheduler,
+                chat_id,
+                message_id,
+                deadline,
+                interval=self._runtime.partial_edit_interval_seconds,
+                metrics=self.metrics,
+                is_current=lambda: self._last_messages.last_message_id(chat_id) == message_id,
+            )
+        context = PluginContext(
+            chat_id=chat_id,
+            message_id=message_id,
+            dry_run=dry_run,
+            deadline=deadline,
+            on_partial=partial.push if partial is not None else None,
+        )
+        try:
+            result = await run_pipeline(
+                rest, source, context, self._daemon.executors, self._daemon.plugin_memo
+            )
+        except BaseException:
+            if partial is not None:
+                partial.cancel()
+                if partial.shown:
+                    # Отменённая задача не может ждать правку: восстанавливаем в фоне
+                    task = asyncio.create_task(self._restore(chat_id, message_id, text))
+                    self._restores.add(task)
+                    task.add_done_callback(self._restores.discard)
+            raise
+        if partial is not None:
+            await partial.settle()
+        # Если сообщение уже правилось по ходу стриминга, итог (или исходный текст) нужно
+        # записать в любом случае
+        shown = partial is not None and partial.shown
+        if not result.completed:
+            self.metrics.incr(f"skips.{result.skip_reason}")
+            if shown:
+                await self._restore(chat_id, message_id, text)
+            return
+
+        transformed = result.text
+        if transformed == text and not shown:
+            self.metrics.incr("skips.unchanged")
+            return
+
+        if dry_run:
+            logger.info(
+                "[dry-run] account=%s chat=%s msg=%s | before=%s | after=%s",
+                self.name,
+                chat_id,
+                message_id,
+                text,
+                transformed,
+            )
+            return
+
+        if self._last_messages.last_message_id(chat_id) != message_id:
+            self._skip("not_last", chat_id, message_id, "уже не последнее сообщение")
+            if shown:
+                await self._restore(chat_id, message_id, text)
+            return
+
+        await self._edit_scheduler.submit(
+            chat_id, message_id, transformed, None if shown else deadline
+        )
+
+    async def _restore(self, chat_id: int, message_id: int, text: str) -> None:
+        """Возвращает исходный текст сообщению, уже показавшему промежуточный вывод.
+
+        Правка идёт без дедлайна: просроченную правку планировщик отбросил бы, и в чате
+        остался бы обрывок ответа модели.
+        """
+        self.metrics.incr("edits.restored")
+        try:
+            await self._edit_scheduler.submit(chat_id, message_id, text)
+        except Exception:
+            logger.exception(
+                "[edit] account=%s chat=%s msg=%s: не удалось вернуть исходный текст",
+                self.name,
+                chat_id,
+                message_id,
+            )
+
+    async def _edit_message(self, chat_id: int, message_id: int, text: str) -> None:
+        await self._client.edit_message(chat_id, message_id, text, parse_mode="md")
+
+    def _skip(self, code: str, chat_id: int, message_id: int, reason: str) -> None:
+        self.metrics.incr(f"skips.{code}")
+        logger.info(
+            "[skip] account=%s chat=%s msg=%s: %s", self.name, chat_id, message_id, reason
+        )
+
+    def stats(self) -> dict[str, object]:
+        self.metrics.set_gauge("edits.per_second", self._edit_scheduler.edits_per_second())
+        self.metrics.set_gauge("chat_state.size", len(self._last_messages))
+        self.metrics.set_gauge("chat_state.evicted", self._last_messages.evicted)
+        return self.metrics.snapshot()
+
+    async def start(self) -> None:
+        await self._client.start()
+        self._edit_scheduler.start()
+        logger.info("Аккаунт %s подключён", self.name)
+
+    async def run_until_disconnected(self) -> None:
+        await self._client.run_until_disconnected()
+
+    async def disconnect(self) -> None:
+        if self._client.is_connected():
+            await self._client.disconnect()
+
+    async def stop(self) -> None:
+        if self._speculator is not None:
+            self._speculator.close()
+        await self._edit_scheduler.stop()
+        await self.disconnect()
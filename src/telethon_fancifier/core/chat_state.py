@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ChatStateTable:
+    """Последнее исходящее сообщение по чатам с вытеснением LRU/TTL.
+
+    Запись старше ``ttl`` секунд уже не может понадобиться: сообщения вне окна
+    редактирования всё равно не правятся. Поэтому вытесняются только такие записи, и
+    свежие записи не теряются, даже если ``max_entries`` ненадолго превышен. Очистка
+    идёт от самого давнего чата при каждом обновлении, за амортизированное O(1) и без
+    фоновой задачи.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl
+        self._entries: OrderedDict[int, tuple[int, float]] = OrderedDict()
+        self.evicted = 0
+        self._overflow_logged = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def touch(self, chat_id: int, message_id: int) -> None:
+        now = time.monotonic()
+        self._entries[chat_id] = (message_id, now)
+        self._entries.move_to_end(chat_id)
+        self._evict(now)
+
+    def last_message_id(self, chat_id: int) -> int | None:
+        entry = self._entries.get(chat_id)
+        return entry[0] if entry is not None else None
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            chat_id, (_, seen_at) = next(iter(self._entries.items()))
+            idle = now - seen_at
+            if idle <= self._ttl and len(self._entries) <= self._max_entries:
+                break
+            if idle <= self._ttl:
+                # Все оставшиеся записи свежие: вытеснять их небезопасно
+                if not self._overflow_logged:
+                    logger.warning(
+                        "[chat-state] активных чатов больше лимита %s, лимит временно превышен",
+                        self._max_entries,
+                    )
+                    self._overflow_logged = True
+                break
+            del self._entries[chat_id]
+            self.evicted += 1
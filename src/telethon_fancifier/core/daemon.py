@@ -2,23 +2,24 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from collections import defaultdict
+import os
+import time
 from dataclasses import dataclass
-from datetime import UTC
 from pathlib import Path
 
-from telethon import TelegramClient, events
-
-from telethon_fancifier.config.paths import get_config_path, get_session_dir
-from telethon_fancifier.config.schema import AppConfig
+from telethon_fancifier.config.diff import ConfigDiff, diff_configs
+from telethon_fancifier.config.schema import AccountConfig, AppConfig
 from telethon_fancifier.config.store import ConfigStore
 from telethon_fancifier.config.watcher import ConfigWatcher
+from telethon_fancifier.core.account import AccountRunner, ClientFactory, default_client_factory
+from telethon_fancifier.core.dispatcher import ChatDispatcher
 from telethon_fancifier.core.errors import AppError
-from telethon_fancifier.core.safeguards import can_edit_last_message
-from telethon_fancifier.core.telegram_credentials import read_telegram_credentials
-from telethon_fancifier.plugins import build_builtin_registry
-from telethon_fancifier.plugins.base import PluginContext
-from telethon_fancifier.plugins.loader import load_external_plugins
+from telethon_fancifier.core.executors import PluginExecutors
+from telethon_fancifier.core.memo import PluginMemo
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.core.pipeline import PipelineSnapshot, compile_snapshot
+from telethon_fancifier.plugins.llm_rewrite import LlmRewritePlugin
+from telethon_fancifier.plugins.loader import external_plugins_signature, load_external_plugins
 from telethon_fancifier.plugins.registry import PluginRegistry
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,13 @@ class DaemonOptions:
     dry_run: bool = False
 
 
+@dataclass(frozen=True, slots=True)
+class _PreparedReload:
+    snapshot: PipelineSnapshot
+    diff: ConfigDiff
+    plugins_signature: tuple[tuple[str, int, int], ...]
+
+
 class FancifierDaemon:
     def __init__(
         self,
@@ -37,131 +45,210 @@ class FancifierDaemon:
         options: DaemonOptions,
         external_plugins_dir: Path | None = None,
         enable_hot_reload: bool = True,
+        accounts: list[AccountConfig] | None = None,
+        client_factory: ClientFactory = default_client_factory,
+        config_store: ConfigStore | None = None,
     ) -> None:
-        self._config = config
-        self._registry = registry
-        self._options = options
+        self._snapshot: PipelineSnapshot = compile_snapshot(config, registry, version=1)
+        self.options = options
         self._external_plugins_dir = external_plugins_dir
+        # Реестр передаётся уже с внешними модулями: запоминаем, какие файлы в нём учтены
+        self._plugins_signature = (
+            external_plugins_signature(external_plugins_dir)
+            if external_plugins_dir is not None
+            else ()
+        )
         self._enable_hot_reload = enable_hot_reload
-        self._last_message_by_chat: dict[int, int] = {}
-        self._locks: dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
-        self._config_store = ConfigStore()
+        self._config_store = config_store if config_store is not None else ConfigStore()
         self._config_watcher: ConfigWatcher | None = None
+        self.metrics = Metrics()
+        self.executors = PluginExecutors(
+            threads=config.runtime.executor_threads,
+            processes=config.runtime.executor_processes,
+            metrics=self.metrics,
+        )
+        self.plugin_memo = PluginMemo(config.runtime.plugin_memo_max_entries)
+        self.dispatcher = ChatDispatcher(
+            workers=config.runtime.max_workers,
+            queue_size=config.runtime.chat_queue_size,
+            metrics=self.metrics,
+        )
+        self._running = False
+        self._reload_lock = asyncio.Lock()
 
         # Setup config watcher if enabled
         if self._enable_hot_reload:
-            self._config_watcher = ConfigWatcher(get_config_path())
-            self._config_watcher.add_callback(self._reload_config)
-
-        credentials = read_telegram_credentials()
-        session_dir = get_session_dir()
-        session_dir.mkdir(parents=True, exist_ok=True)
-        session_path = session_dir / credentials.session_name
-
-        self._client = TelegramClient(
-            str(session_path),
-            credentials.api_id,
-            credentials.api_hash,
-        )
+            self._config_watcher = ConfigWatcher(self._config_store.path)
+            self._config_watcher.add_callback(self.reload_config)
 
-    def _reload_config(self) -> None:
-        """Reload configuration and rebuild plugin registry."""
-        try:
-            new_config = self._config_store.load()
-            self._config = new_config
-            
-            # Rebuild registry with new config
-            new_registry = build_builtin_registry(new_config)
-            if self._external_plugins_dir is not None:
-                load_external_plugins(new_registry, self._external_plugins_dir)
-            self._registry = new_registry
-            
-            logger.info("Configuration and plugins reloaded successfully")
-        except Exception:  # noqa: BLE001
-            logger.exception("Failed to reload configuration, keeping old config")
-
-    def _chat_plugins(self, chat_id: int) -> list[str]:
-        for chat in self._config.chats:
-            if chat.chat_id == chat_id:
-                return chat.plugin_order
-        return []
+        selected = accounts if accounts is not None else resolve_accounts(config)
+        if not selected:
+            raise AppError("Не выбрано ни одного аккаунта для запуска.")
+        self.accounts = [
+            AccountRunner(self, account, config.runtime, client_factory) for account in selected
+        ]
 
-    async def run(self) -> None:
-        # Start config watcher if enabled
-        if self._config_watcher is not None:
-            await self._config_watcher.start()
+    @property
+    def snapshot(self) -> PipelineSnapshot:
+        return self._snapshot
 
-        @self._client.on(events.NewMessage(outgoing=True))
-        async def on_outgoing(event: events.NewMessage.Event) -> None:
-            if event.message is None or event.message.id is None or event.chat_id is None:
-                return
+    async def reload_config(self) -> None:
+        """Применяет изменения конфига, пересобирая только затронутые части.
 
-            chat_id = int(event.chat_id)
-            message_id = int(event.message.id)
-            text = event.raw_text or ""
-            if not text:
+        Чтение и разбор файла, импорт внешних модулей и компиляция конвейеров идут в
+        рабочем потоке; на цикле событий остаётся только подмена снимка. Провайдер LLM,
+        его пул соединений и объекты модулей сохраняются.
+        """
+        started = time.perf_counter()
+        async with self._reload_lock:
+            try:
+                prepared = await asyncio.to_thread(self._prepare_reload, self._snapshot)
+            except Exception:
+                logger.exception("Failed to reload configuration, keeping old config")
                 return
-
-            plugin_ids = self._chat_plugins(chat_id)
-            if not plugin_ids:
+            if prepared is None:
+                logger.info(
+                    "[reload] конфиг не изменился, снимок v%s сохранён", self._snapshot.version
+                )
                 return
 
-            self._last_message_by_chat[chat_id] = message_id
+            stall = self._apply_reload(prepared)
 
-            async with self._locks[chat_id]:
-                guard = can_edit_last_message(
-                    message_id=message_id,
-                    last_message_id=self._last_message_by_chat.get(chat_id),
-                    message_date=event.message.date.astimezone(UTC),
-                    max_age_seconds=10,
-                )
-                if not guard.ok:
-                    logger.info("[skip] chat=%s msg=%s: %s", chat_id, message_id, guard.reason)
-                    return
-
-                transformed = text
-                for plugin_id in plugin_ids:
-                    try:
-                        plugin = self._registry.get(plugin_id)
-                        transformed = await plugin.transform(
-                            transformed,
-                            PluginContext(
-                                chat_id=chat_id,
-                                message_id=message_id,
-                                dry_run=self._options.dry_run,
-                            ),
-                        )
-                    except Exception as exc:  # noqa: BLE001
-                        logger.exception("[plugin-error] %s: %s", plugin_id, exc)
-                        return
-
-                if transformed == text:
-                    return
-
-                if self._options.dry_run:
-                    logger.info(
-                        "[dry-run] chat=%s msg=%s | before=%s | after=%s",
-                        chat_id,
-                        message_id,
-                        text,
-                        transformed,
-                    )
-                    return
-
-                if self._last_message_by_chat.get(chat_id) != message_id:
-                    logger.info(
-                        "[skip] chat=%s msg=%s: уже не последнее сообщение",
-                        chat_id,
-                        message_id,
-                    )
-                    return
-
-                await self._client.edit_message(chat_id, message_id, transformed, parse_mode="md")
+        elapsed = time.perf_counter() - started
+        self.metrics.incr("config.reloads")
+        self.metrics.observe("config.reload_seconds", elapsed)
+        self.metrics.observe("config.reload_loop_stall", stall)
+        logger.info(
+            "[reload] снимок v%s (%s) применён за %.1f мс, цикл занят %.2f мс",
+            self._snapshot.version,
+            prepared.diff.summary() if not prepared.diff.empty else "внешние модули",
+            elapsed * 1000,
+            stall * 1000,
+        )
+
+    def _prepare_reload(self, previous: PipelineSnapshot) -> _PreparedReload | None:
+        """Вся тяжёлая часть перезагрузки; не трогает состояние, видимое обработчикам."""
+        new_config = self._config_store.load()
+        diff = diff_configs(previous.config, new_config)
+        registry, signature = self._refresh_external_plugins(previous.registry)
+        if diff.empty and registry is previous.registry:
+            return None
+        snapshot = compile_snapshot(
+            new_config,
+            registry,
+            version=previous.version + 1,
+            previous=previous,
+            rebuild=diff.rebuild_chats,
+        )
+        return _PreparedReload(snapshot=snapshot, diff=diff, plugins_signature=signature)
+
+    def _apply_reload(self, prepared: _PreparedReload) -> float:
+        """Подмена снимка на цикле событий; возвращает, сколько цикл был занят."""
+        started = time.perf_counter()
+        previous = self._snapshot
+        snapshot = prepared.snapshot
+        if prepared.diff.llm_changed:
+            for plugin in snapshot.registry.all():
+                if isinstance(plugin, LlmRewritePlugin):
+                    plugin.update_llm_config(snapshot.config.llm)
+
+        # Single attribute swap: handlers never see a half-reloaded config/registry pair
+        self._snapshot = snapshot
+        self._plugins_signature = prepared.plugins_signature
+        if prepared.diff.runtime_changed or prepared.diff.accounts_changed:
+            logger.warning(
+                "[reload] изменения runtime/accounts вступят в силу после перезапуска демона"
+            )
+
+        if self._running:
+            for account in self.accounts:
+                account.register_handler(snapshot)
+            # Пулы нужны только модулям из цепочек: набор мог измениться вместе с конфигом
+            self.executors.prepare(snapshot.used_plugins())
+        if snapshot.registry is not previous.registry:
+            # Модули могли перезагрузиться из файлов с другим поведением
+            self.plugin_memo.clear()
+        return time.perf_counter() - started
+
+    def _refresh_external_plugins(
+        self, registry: PluginRegistry
+    ) -> tuple[PluginRegistry, tuple[tuple[str, int, int], ...]]:
+        signature = self._plugins_signature
+        if self._external_plugins_dir is None:
+            return registry, signature
+        current = external_plugins_signature(self._external_plugins_dir)
+        if current == signature:
+            return registry, signature
+        refreshed = registry.copy(include_external=False)
+        load_external_plugins(refreshed, self._external_plugins_dir)
+        return refreshed, current
+
+    def stats(self) -> dict[str, object]:
+        self.metrics.set_gauge("dispatch.queue_depth", self.dispatcher.depth())
+        plugins: dict[str, object] = {}
+        for plugin in self._snapshot.registry.all():
+            stats = getattr(plugin, "stats", None)
+            if callable(stats):
+                plugins[plugin.plugin_id] = stats()
+        return {
+            "daemon": self.metrics.snapshot(),
+            "accounts": {account.name: account.stats() for account in self.accounts},
+            "plugins": plugins,
+            "plugin_memo": self.plugin_memo.stats(),
+        }
+
+    async def _plugin_hook(self, name: str) -> None:
+        """Вызывает необязательный хук ``start``/``aclose`` у всех модулей реестра."""
+        for plugin in self._snapshot.registry.all():
+            hook = getattr(plugin, name, None)
+            if not callable(hook):
+                continue
+            try:
+                await hook()
+            except Exception:
+                logger.exception("[plugin-error] %s.%s", plugin.plugin_id, name)
+
+    async def _stats_loop(self) -> None:
+        interval = self._snapshot.config.runtime.stats_interval_seconds
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            logger.info("[stats] %s", self.stats())
+
+    async def shutdown(self) -> None:
+        """Отключает все аккаунты; ``run`` после этого штатно завершается."""
+        for account in self.accounts:
+            await account.disconnect()
+
+    async def run(self) -> None:
+        # Start config watcher if enabled
+        if self._config_watcher is not None:
+            await self._config_watcher.start()
+
+        for account in self.accounts:
+            account.register_handler(self._snapshot)
+        self._running = True
+        self.executors.prepare(self._snapshot.used_plugins())
+        self.dispatcher.start()
+        stats_task = asyncio.create_task(self._stats_loop())
+        # Прогрев соединений идёт параллельно со входом в аккаунты
+        plugins_start = asyncio.create_task(self._plugin_hook("start"))
 
         try:
-            await self._client.start()
-            logger.info("Демон запущен. Нажмите Ctrl+C для остановки.")
-            await self._client.run_until_disconnected()
+            # Вход выполняется последовательно: интерактивная авторизация не должна смешиваться
+            for account in self.accounts:
+                await account.start()
+            logger.info(
+                "Демон запущен (аккаунтов: %s). Нажмите Ctrl+C для остановки.", len(self.accounts)
+            )
+            results = await asyncio.gather(
+                *(account.run_until_disconnected() for account in self.accounts),
+                return_exceptions=True,
+            )
+            failures = [result for result in results if isinstance(result, BaseException)]
+            if failures:
+                raise failures[0]
         except AppError:
             raise
         except Exception as exc:
@@ -170,6 +257,34 @@ class FancifierDaemon:
                 "Демон остановлен из-за ошибки Telegram API/сети. Подробности в логе."
             ) from exc
         finally:
+            self._running = False
             # Stop config watcher
             if self._config_watcher is not None:
                 await self._config_watcher.stop()
+            stats_task.cancel()
+            plugins_start.cancel()
+            await self.dispatcher.stop()
+            for account in self.accounts:
+                await account.stop()
+            self.executors.shutdown()
+            await self._plugin_hook("aclose")
+            logger.info("[stats] %s", self.stats())
+
+
+def resolve_accounts(config: AppConfig, names: list[str] | None = None) -> list[AccountConfig]:
+    """Аккаунты для запуска: из конфига (с фильтром по именам) или один сеанс из .env."""
+    if not config.accounts:
+        session_name = os.getenv("TELEGRAM_SESSION_NAME", "telethon_fancifier").strip()
+        legacy = [AccountConfig(session_name=session_name)]
+        configured = legacy
+    else:
+        configured = config.accounts
+
+    if not names:
+        return list(configured)
+
+    by_name = {account.session_name: account for account in configured}
+    missing = [name for name in names if name not in by_name]
+    if missing:
+        raise AppError(f"Аккаунты не найдены в конфиге: {', '.join(missing)}")
+    return [by_name[name] for name in names]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Coroutine, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+from telethon_fancifier.core.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Coroutine[Any, Any, None]]
+
+
+@dataclass(slots=True)
+class _QueuedJob:
+    job: Job
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ChatDispatcher:
+    """Упорядоченные очереди на каждый чат и общий пул воркеров с ограничением параллелизма.
+
+    ``submit`` никогда не блокирует вызывающего: Telethon-цикл только кладёт задачу в очередь.
+    Задачи одного чата выполняются строго по очереди, задачи разных чатов — параллельно,
+    но не больше ``workers`` одновременно. При переполнении очереди чата вытесняется самая
+    старая задача (load shedding).
+    """
+
+    def __init__(self, workers: int, queue_size: int, metrics: Metrics) -> None:
+        self._workers = max(1, workers)
+        self._queue_size = max(1, queue_size)
+        self._metrics = metrics
+        self._pending: dict[Hashable, deque[_QueuedJob]] = {}
+        self._running: dict[Hashable, asyncio.Task[None]] = {}
+        self._ready: asyncio.Queue[Hashable] = asyncio.Queue()
+        self._worker_tasks: list[asyncio.Task[None]] = []
+
+    def submit(self, key: Hashable, job: Job, latest_wins: bool = False) -> None:
+        queue = self._pending.get(key)
+        if queue is None:
+            queue = self._pending[key] = deque()
+            if key not in self._running:
+                self._ready.put_nowait(key)
+
+        if latest_wins:
+            if queue:
+                self._metrics.incr("transforms.superseded", len(queue))
+                queue.clear()
+            running = self._running.get(key)
+            if running is not None and not running.done():
+                running.cancel()
+                self._metrics.incr("transforms.superseded")
+        elif len(queue) >= self._queue_size:
+            queue.popleft()
+            self._metrics.incr("dispatch.shed")
+            logger.warning("[dispatch] очередь %s переполнена, старая задача отброшена", key)
+
+        queue.append(_QueuedJob(job))
+        self._metrics.set_gauge("dispatch.queue_depth", self.depth())
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self._pending.values())
+
+    def start(self) -> None:
+        if self._worker_tasks:
+            return
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"fancifier-worker-{index}")
+            for index in range(self._workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._running.values():
+            task.cancel()
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._pending.get(key)
+            if not queue:
+                self._pending.pop(key, None)
+                continue
+
+            queued = queue.popleft()
+            self._metrics.observe("dispatch.wait", time.monotonic() - queued.enqueued_at)
+            self._metrics.set_gauge("dispatch.queue_depth", self.depth())
+
+            task = asyncio.create_task(queued.job())
+            self._running[key] = task
+            try:
+                await asyncio.wait([task])
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                del self._running[key]
+                if self._pending.get(key):
+                    self._ready.put_nowait(key)
+                else:
+                    self._pending.pop(key, None)
+
+            exc = None if task.cancelled() else task.exception()
+            if exc is not None:
+                logger.error("[dispatch] ошибка обработки %s: %s", key, exc, exc_info=exc)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from telethon.errors import FloodWaitError, MessageNotModifiedError
+
+from telethon_fancifier.core.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_WINDOW_SECONDS = 60.0
+
+EditFunc = Callable[[int, int, str], Awaitable[object]]
+
+
+class TokenBucket:
+    """Классический token bucket: ``rate`` токенов в секунду, не больше ``capacity`` в запасе."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self._rate = max(rate, 0.001)
+        self._capacity = max(1, capacity)
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+
+    def wait_time(self) -> float:
+        """Сколько ждать до следующего токена (0, если токен есть)."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+    def take(self) -> None:
+        self._refill()
+        self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+@dataclass(order=True, slots=True)
+class _PendingEdit:
+    deadline: float
+    seq: int
+    chat_id: int = field(compare=False)
+    message_id: int = field(compare=False)
+    text: str = field(compare=False)
+    future: asyncio.Future[bool] = field(compare=False)
+
+
+class EditScheduler:
+    """Единая очередь правок аккаунта с учётом лимитов Telegram.
+
+    Правки выдаются в порядке близости дедлайна (окна редактирования), ограничены общим
+    token bucket, при ``FloodWaitError`` вся очередь ставится на паузу на указанное время.
+    Правки, чей дедлайн уже прошёл, отбрасываются без запроса к API.
+    """
+
+    def __init__(self, edit: EditFunc, rate: float, burst: int, metrics: Metrics) -> None:
+        self._edit = edit
+        self._bucket = TokenBucket(rate, burst)
+        self._metrics = metrics
+        self._heap: list[_PendingEdit] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._paused_until = 0.0
+        self._task: asyncio.Task[None] | None = None
+        self._inflight: set[asyncio.Task[None]] = set()
+        self._sent_times: deque[float] = deque()
+
+    async def submit(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        deadline: float | None = None,
+    ) -> bool:
+        """Ставит правку в очередь и ждёт её результата. False — правка отброшена."""
+        future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._heap,
+            _PendingEdit(
+                deadline=deadline if deadline is not None else math.inf,
+                seq=next(self._seq),
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+                future=future,
+            ),
+        )
+        self._metrics.set_gauge("edits.pending", len(self._heap))
+        self._wakeup.set()
+        return await future
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="fancifier-edit-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._inflight):
+            task.cancel()
+        for pending in self._heap:
+            if not pending.future.done():
+                pending.future.cancel()
+        self._heap.clear()
+
+    def edits_per_second(self) -> float:
+        """Средняя скорость правок за последние ``RATE_WINDOW_SECONDS`` секунд."""
+        self._trim_sent(time.monotonic())
+        return len(self._sent_times) / RATE_WINDOW_SECONDS
+
+    def _trim_sent(self, now: float) -> None:
+        while self._sent_times and now - self._sent_times[0] > RATE_WINDOW_SECONDS:
+            self._sent_times.popleft()
+
+    async def _run(self) -> None:
+        while True:
+            self._drop_stale(time.monotonic())
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            wait = max(self._paused_until - now, self._bucket.wait_time())
+            if wait > 0:
+                # Во время паузы просыпаемся к ближайшему дедлайну и на каждую новую
+                # правку, чтобы отклонять устаревшие сразу, а не после паузы
+                wait = min(wait, self._heap[0].deadline - now)
+                self._metrics.observe("edits.throttle_wait", wait)
+                self._wakeup.clear()
+                try:
+                    async with asyncio.timeout(wait):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    pass
+                continue
+
+            pending = heapq.heappop(self._heap)
+            self._metrics.set_gauge("edits.pending", len(self._heap))
+            self._bucket.take()
+            task = asyncio.create_task(self._send(pending))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    def _drop_stale(self, now: float) -> None:
+        """Снимает с вершины очереди отменённые правки и правки с истёкшим дедлайном."""
+        while self._heap and (self._heap[0].future.done() or self._heap[0].deadline <= now):
+            pending = heapq.heappop(self._heap)
+            self._metrics.set_gauge("edits.pending", len(self._heap))
+            if pending.future.done():
+                continue
+            self._metrics.incr("edits.dropped_stale")
+            logger.info(
+                "[edit] chat=%s msg=%s: окно редактирования истекло в очереди",
+                pending.chat_id,
+                pending.message_id,
+            )
+            pending.future.set_result(False)
+
+    async def _send(self, pending: _PendingEdit) -> None:
+        try:
+            await self._edit(pending.chat_id, pending.message_id, pending.text)
+        except FloodWaitError as exc:
+            seconds = float(exc.seconds)
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._metrics.incr("edits.flood_wait")
+            self._metrics.observe("edits.flood_wait_seconds", seconds)
+            logger.warning("[edit] FloodWait %.0f с, правки приостановлены", seconds)
+            if pending.future.done():
+                return
+            if pending.deadline > self._paused_until:
+                heapq.heappush(self._heap, pending)
+                self._wakeup.set()
+            else:
+                self._metrics.incr("edits.dropped_stale")
+                pending.future.set_result(False)
+        except MessageNotModifiedError:
+            self._metrics.incr("edits.not_modified")
+            if not pending.future.done():
+                pending.future.set_result(True)
+        except Exception as exc:  # noqa: BLE001
+            if not pending.future.done():
+                pending.future.set_exception(exc)
+        else:
+            self._metrics.incr("edits.sent")
+            now = time.monotonic()
+            self._sent_times.append(now)
+            self._trim_sent(now)
+            if not pending.future.done():
+                pending.future.set_result(True)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import importlib.util
+import inspect
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.plugins.base import (
+    EXECUTION_BLOCKING,
+    EXECUTION_CPU_BOUND,
+    Plugin,
+    PluginContext,
+    plugin_execution,
+)
+
+logger = logging.getLogger(__name__)
+
+# Версия файла внешнего плагина: (mtime_ns, размер); у импортируемых модулей — None
+SourceVersion = tuple[int, int] | None
+
+# Кэш плагинов внутри процесса-воркера: (источник, plugin_id) -> (версия, объект плагина)
+_PROCESS_PLUGINS: dict[tuple[str, str], tuple[SourceVersion, Any]] = {}
+
+
+def _warmup() -> None:
+    """Пустая задача: заставляет пул заранее поднять процесс/поток."""
+
+
+def _plugin_source(plugin: Plugin) -> str | None:
+    """Модуль или файл, из которого воркер-процесс может пересоздать плагин через get_plugin()."""
+    try:
+        # Класс внешнего плагина не лежит в sys.modules, поэтому файл берём из кода метода
+        path = inspect.getfile(type(plugin).transform_sync)  # type: ignore[attr-defined]
+    except (AttributeError, TypeError):
+        return None
+
+    module_name = type(plugin).__module__
+    module = sys.modules.get(module_name)
+    importable = module is not None and getattr(module, "__file__", None) == path
+    if importable and module_name != "__main__":
+        return module_name if callable(getattr(module, "get_plugin", None)) else None
+    # Внешние плагины грузятся из файла мимо sys.modules и обязаны экспортировать get_plugin()
+    return path
+
+
+def _source_version(source: str) -> SourceVersion:
+    """Версия файла плагина: после hot-reload воркер должен перечитать изменённый файл."""
+    if not source.endswith(".py"):
+        return None
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_process_plugin(source: str, version: SourceVersion, plugin_id: str) -> Any:
+    cached = _PROCESS_PLUGINS.get((source, plugin_id))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    if source.endswith(".py"):
+        spec = importlib.util.spec_from_file_location(f"_fancifier_worker_{plugin_id}", source)
+        if spec is None or spec.loader is None:
+            raise RuntimeError(f"Не удалось загрузить модуль: {source}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(source)
+
+    plugin = module.get_plugin()
+    _PROCESS_PLUGINS[(source, plugin_id)] = (version, plugin)
+    return plugin
+
+
+def _run_in_process(
+    source: str, version: SourceVersion, plugin_id: str, text: str, context: PluginContext
+) -> str:
+    plugin = _load_process_plugin(source, version, plugin_id)
+    return str(plugin.transform_sync(text, context))
+
+
+class PluginExecutors:
+    """Пулы потоков и процессов для блокирующих и CPU-bound плагинов.
+
+    Пулы создаются лениво при первом таком плагине и сразу прогреваются, чтобы первое
+    сообщение не платило за запуск воркеров.
+    """
+
+    def __init__(self, threads: int, processes: int, metrics: Metrics) -> None:
+        self._threads = max(1, threads)
+        self._processes = max(0, processes)
+        self._metrics = metrics
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._sources: dict[str, tuple[str, SourceVersion] | None] = {}
+
+    def prepare(self, plugins: list[Plugin]) -> None:
+        """Поднимает нужные пулы для набора плагинов (вызывается при старте и reload)."""
+        self._sources.clear()
+        for plugin in plugins:
+            mode = plugin_execution(plugin)
+            if mode == EXECUTION_BLOCKING:
+                self._ensure_thread_pool()
+            elif mode == EXECUTION_CPU_BOUND:
+                if self._process_source(plugin) is None:
+                    self._ensure_thread_pool()
+                else:
+                    self._ensure_process_pool()
+
+    async def run(self, plugin: Plugin, text: str, context: PluginContext) -> str:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            source = None
+            if plugin_execution(plugin) == EXECUTION_CPU_BOUND:
+                source = self._process_source(plugin)
+            if source is not None:
+                pool: Executor = self._ensure_process_pool()
+                location, version = source
+                result = await loop.run_in_executor(
+                    pool, _run_in_process, location, version, plugin.plugin_id, text, context
+                )
+            else:
+                pool = self._ensure_thread_pool()
+                result = await loop.run_in_executor(
+                    pool,
+                    plugin.transform_sync,  # type: ignore[attr-defined]
+                    text,
+                    context,
+                )
+            return str(result)
+        finally:
+            self._metrics.observe(
+                f"executor.{plugin.plugin_id}", time.perf_counter() - started
+            )
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def _process_source(self, plugin: Plugin) -> tuple[str, SourceVersion] | None:
+        # prepare() сбрасывает кэш при reload, и версия файла читается заново
+        if self._processes == 0:
+            return None
+        if plugin.plugin_id not in self._sources:
+            source = _plugin_source(plugin)
+            if source is None:
+                logger.warning(
+                    "[executor] %s: нет get_plugin() для процесса, используется пул потоков",
+                    plugin.plugin_id,
+                )
+                self._sources[plugin.plugin_id] = None
+            else:
+                self._sources[plugin.plugin_id] = (source, _source_version(source))
+        return self._sources[plugin.plugin_id]
+
+    def _ensure_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self._threads, thread_name_prefix="fancifier-plugin"
+            )
+            for _ in range(self._threads):
+                self._thread_pool.submit(_warmup)
+            logger.info("[executor] пул потоков запущен: %s", self._threads)
+        return self._thread_pool
+
+    def _ensure_process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self._processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            for _ in range(self._processes):
+                self._process_pool.submit(_warmup)
+            logger.info("[executor] пул процессов запущен: %s", self._processes)
+        return self._process_pool
@@ -5,7 +5,7 @@ from telethon_fancifier.core.errors import AppError
 from telethon_fancifier.plugins.base import PluginContext
 from telethon_fancifier.plugins.llm_rewrite import LlmRewritePlugin
 from telethon_fancifier.providers.base import BaseLlmProvider
-from telethon_fancifier.providers.deepseek import DeepSeekProvider
+from telethon_fancifier.providers.factory import build_llm_provider
 
 
 async def preview_llm_response(
@@ -19,9 +19,15 @@ async def preview_llm_response(
     if not cleaned:
         raise AppError("Текст для LLM-теста пустой. Передайте --text или введите текст в интерактивном режиме.")
 
-    active_provider: BaseLlmProvider = provider if provider is not None else DeepSeekProvider()
-    plugin = LlmRewritePlugin(active_provider, llm_config=llm_config)
-    return await plugin.transform(
-        cleaned,
-        PluginContext(chat_id=chat_id, message_id=0, dry_run=True),
+    active_provider: BaseLlmProvider = (
+        provider if provider is not None else build_llm_provider()
     )
+    plugin = LlmRewritePlugin(active_provider, llm_config=llm_config)
+    try:
+        return await plugin.transform(
+            cleaned,
+            PluginContext(chat_id=chat_id, message_id=0, dry_run=True),
+        )
+    finally:
+        if provider is None:
+            await plugin.aclose()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+
+MemoKey = tuple[tuple[str, ...], str]
+
+
+class PluginMemo:
+    """Ограниченный LRU результатов чистых модулей (``pure = True``).
+
+    Ключ — цепочка идентификаторов модулей и входной текст: ``(("a",), text)`` хранит
+    результат одного модуля, ``(("a", "b"), text)`` — результат чистого префикса цепочки
+    от исходного текста. Записи не устаревают по времени: результат чистого модуля
+    зависит только от входа, а при перезагрузке модулей демон очищает кеш целиком.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max(0, max_entries)
+        self._entries: OrderedDict[MemoKey, str] = OrderedDict()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self.evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: MemoKey) -> str | None:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: MemoKey, value: str) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def record(self, plugin_id: str, hit: bool) -> None:
+        counters = self._hits if hit else self._misses
+        counters[plugin_id] = counters.get(plugin_id, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, object]:
+        plugins: dict[str, dict[str, float]] = {}
+        for plugin_id in sorted(self._hits.keys() | self._misses.keys()):
+            hits = self._hits.get(plugin_id, 0)
+            misses = self._misses.get(plugin_id, 0)
+            plugins[plugin_id] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses),
+            }
+        return {"size": len(self._entries), "evicted": self.evicted, "plugins": plugins}
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class TimingStat:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    """Простые счётчики, gauge-значения и тайминги демона без внешних зависимостей."""
+
+    def __init__(self) -> None:
+        self._counters: dict[str, int] = {}
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, TimingStat] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        stat = self._timings.get(name)
+        if stat is None:
+            stat = self._timings[name] = TimingStat()
+        stat.add(seconds)
+
+    def counter(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def timing(self, name: str) -> TimingStat:
+        return self._timings.get(name, TimingStat())
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "counters": dict(self._counters),
+            "gauges": dict(self._gauges),
+            "timings": {
+                name: {"count": stat.count, "avg": stat.avg, "max": stat.max}
+                for name, stat in self._timings.items()
+            },
+        }
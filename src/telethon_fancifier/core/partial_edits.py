@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+
+from telethon_fancifier.core.edit_scheduler import EditScheduler
+from telethon_fancifier.core.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PartialEditThrottle:
+    """Промежуточные правки одного сообщения во время стриминга.
+
+    Одновременно в очереди планировщика не больше одной промежуточной правки, и
+    отправляются они не чаще ``interval`` секунд; общий лимит аккаунта соблюдает
+    ``EditScheduler``. Перед финальной правкой нужно дождаться ``settle()``, чтобы
+    запоздавшая промежуточная правка не перезаписала итоговый текст.
+    """
+
+    def __init__(
+        self,
+        scheduler: EditScheduler,
+        chat_id: int,
+        message_id: int,
+        deadline: float | None,
+        interval: float,
+        metrics: Metrics,
+        is_current: Callable[[], bool],
+    ) -> None:
+        self._scheduler = scheduler
+        self._chat_id = chat_id
+        self._message_id = message_id
+        self._deadline = deadline
+        self._interval = interval
+        self._metrics = metrics
+        self._is_current = is_current
+        self._started = time.monotonic()
+        self._last_sent = -math.inf
+        self._last_text = ""
+        self._task: asyncio.Task[bool] | None = None
+        self.shown = False
+
+    def push(self, text: str) -> None:
+        text = text.strip()
+        if not text or text == self._last_text:
+            return
+        if self._task is not None and not self._task.done():
+            return
+        now = time.monotonic()
+        if now - self._last_sent < self._interval or not self._is_current():
+            return
+
+        if not self.shown:
+            self._metrics.observe("stream.first_partial_edit", now - self._started)
+        self.shown = True
+        self._last_sent = now
+        self._last_text = text
+        self._metrics.incr("edits.partial")
+        self._task = asyncio.create_task(
+            self._scheduler.submit(self._chat_id, self._message_id, text, self._deadline)
+        )
+
+    async def settle(self) -> None:
+        """Дожидается промежуточной правки, которая уже в пути."""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
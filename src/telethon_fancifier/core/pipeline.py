@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+
+from telethon_fancifier.config.schema import AppConfig, ChatConfig
+from telethon_fancifier.core.errors import AppError
+from telethon_fancifier.core.executors import PluginExecutors
+from telethon_fancifier.core.memo import PluginMemo
+from telethon_fancifier.plugins.base import (
+    EXECUTION_ASYNC,
+    Plugin,
+    PluginContext,
+    plugin_execution,
+    plugin_is_per_message,
+    plugin_is_pure,
+)
+from telethon_fancifier.plugins.registry import PluginRegistry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledPipeline:
+    """Цепочка модулей чата с уже разрешёнными объектами плагинов."""
+
+    chat_id: int
+    plugin_ids: tuple[str, ...]
+    plugins: tuple[Plugin, ...]
+    latest_wins: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class PipelineSnapshot:
+    """Неизменяемый снимок конфига и реестра, который демон подменяет целиком."""
+
+    version: int
+    config: AppConfig
+    registry: PluginRegistry
+    pipelines: Mapping[int, CompiledPipeline]
+
+    def get(self, chat_id: int) -> CompiledPipeline | None:
+        return self.pipelines.get(chat_id)
+
+    def used_plugins(self) -> list[Plugin]:
+        """Модули, которые стоят хотя бы в одной цепочке, без повторов."""
+        used: dict[str, Plugin] = {}
+        for pipeline in self.pipelines.values():
+            for plugin_id, plugin in zip(pipeline.plugin_ids, pipeline.plugins):
+                used.setdefault(plugin_id, plugin)
+        return list(used.values())
+
+
+@dataclass(slots=True)
+class PipelineResult:
+    text: str
+    skip_reason: str = ""
+
+    @property
+    def completed(self) -> bool:
+        return not self.skip_reason
+
+
+def sub_pipeline(
+    pipeline: CompiledPipeline, start: int, stop: int | None = None
+) -> CompiledPipeline:
+    """Шаги ``start:stop`` цепочки как отдельная цепочка того же чата."""
+    return replace(
+        pipeline,
+        plugin_ids=pipeline.plugin_ids[start:stop],
+        plugins=pipeline.plugins[start:stop],
+    )
+
+
+def message_independent_length(pipeline: CompiledPipeline) -> int:
+    """Число первых шагов, результат которых не зависит от ``message_id``."""
+    for index, plugin in enumerate(pipeline.plugins):
+        if plugin_is_per_message(plugin):
+            return index
+    return len(pipeline.plugins)
+
+
+def compile_pipeline(chat: ChatConfig, registry: PluginRegistry) -> CompiledPipeline:
+    plugins = tuple(registry.get(plugin_id) for plugin_id in chat.plugin_order)
+    return CompiledPipeline(
+        chat_id=chat.chat_id,
+        plugin_ids=tuple(chat.plugin_order),
+        plugins=plugins,
+        latest_wins=chat.latest_wins,
+    )
+
+
+def _reusable(
+    previous: PipelineSnapshot | None,
+    chat_id: int,
+    registry: PluginRegistry,
+    rebuild: frozenset[int] | None,
+) -> CompiledPipeline | None:
+    if previous is None or rebuild is None or chat_id in rebuild:
+        return None
+    pipeline = previous.get(chat_id)
+    if pipeline is None:
+        return None
+    # Модуль мог быть перезагружен из файла: тогда цепочку нужно собрать заново
+    for plugin_id, plugin in zip(pipeline.plugin_ids, pipeline.plugins):
+        try:
+            if registry.get(plugin_id) is not plugin:
+                return None
+        except AppError:
+            return None
+    return pipeline
+
+
+def compile_snapshot(
+    config: AppConfig,
+    registry: PluginRegistry,
+    version: int,
+    previous: PipelineSnapshot | None = None,
+    rebuild: frozenset[int] | None = None,
+) -> PipelineSnapshot:
+    """Собирает снимок; с ``previous`` и ``rebuild`` переиспользует нетронутые цепочки.
+
+    ``rebuild`` — чаты, чья настройка изменилась. Остальные цепочки берутся из
+    ``previous`` как есть, если их модули в реестре остались теми же объектами.
+    """
+    pipelines: dict[int, CompiledPipeline] = {}
+    for chat in config.chats:
+        if not chat.plugin_order or chat.chat_id in pipelines:
+            continue
+        reused = _reusable(previous, chat.chat_id, registry, rebuild)
+        if reused is not None:
+            pipelines[chat.chat_id] = reused
+            continue
+        try:
+            pipelines[chat.chat_id] = compile_pipeline(chat, registry)
+        except AppError as exc:
+            logger.error("[pipeline] чат %s пропущен: %s", chat.chat_id, exc.user_message)
+
+    return PipelineSnapshot(
+        version=version,
+        config=config,
+        registry=registry,
+        pipelines=MappingProxyType(pipelines),
+    )
+
+
+async def run_step(
+    plugin: Plugin,
+    text: str,
+    context: PluginContext,
+    executors: PluginExecutors | None = None,
+) -> str:
+    """Один шаг цепочки: блокирующие и CPU-bound модули уходят в пул воркеров."""
+    if executors is not None and plugin_execution(plugin) != EXECUTION_ASYNC:
+        if context.on_partial is not None:
+            context = replace(context, on_partial=None)
+        return await executors.run(plugin, text, context)
+    return await plugin.transform(text, context)
+
+
+def _memo_prefix(
+    pipeline: CompiledPipeline, text: str, memo: PluginMemo, pure_len: int
+) -> tuple[int, str]:
+    """Самый длинный закешированный чистый префикс: (число пропущенных шагов, текст)."""
+    for length in range(pure_len, 1, -1):
+        cached = memo.get((pipeline.plugin_ids[:length], text))
+        if cached is not None:
+            for plugin_id in pipeline.plugin_ids[:length]:
+                memo.record(plugin_id, hit=True)
+            return length, cached
+    return 0, text
+
+
+async def run_pipeline(
+    pipeline: CompiledPipeline,
+    text: str,
+    context: PluginContext,
+    executors: PluginExecutors | None = None,
+    memo: PluginMemo | None = None,
+) -> PipelineResult:
+    """Прогоняет текст через цепочку, останавливаясь, когда правка уже невозможна.
+
+    С ``memo`` результаты чистых модулей берутся из кеша: сначала по самому длинному
+    чистому префиксу цепочки, затем по отдельным модулям.
+    """
+    transformed = text
+    last_index = len(pipeline.plugins) - 1
+    # Промежуточный вывод имеет смысл показывать только у последнего шага
+    inner_context = replace(context, on_partial=None) if context.on_partial else context
+    start = pure_len = 0
+    if memo is not None and not memo.enabled:
+        memo = None
+    if memo is not None:
+        for plugin in pipeline.plugins:
+            if not plugin_is_pure(plugin):
+                break
+            pure_len += 1
+        start, transformed = _memo_prefix(pipeline, text, memo, pure_len)
+
+    for index in range(start, last_index + 1):
+        plugin_id = pipeline.plugin_ids[index]
+        plugin = pipeline.plugins[index]
+        step_context = context if index == last_index else inner_context
+        if context.expired():
+            logger.info(
+                "[skip] chat=%s msg=%s: дедлайн правки истёк перед %s",
+                context.chat_id,
+                context.message_id,
+                plugin_id,
+            )
+            return PipelineResult(transformed, "deadline")
+
+        cached = None
+        if memo is not None and plugin_is_pure(plugin):
+            cached = memo.get(((plugin_id,), transformed))
+            memo.record(plugin_id, hit=cached is not None)
+        if cached is not None:
+            transformed = cached
+        else:
+            step_input = transformed
+            try:
+                transformed = await run_step(plugin, transformed, step_context, executors)
+            except Exception:
+                logger.exception("[plugin-error] %s", plugin_id)
+                return PipelineResult(transformed, "plugin_error")
+            if memo is not None and plugin_is_pure(plugin):
+                memo.put(((plugin_id,), step_input), transformed)
+        if memo is not None and 0 < index < pure_len:
+            memo.put((pipeline.plugin_ids[: index + 1], text), transformed)
+
+    if context.expired():
+        return PipelineResult(transformed, "deadline")
+    return PipelineResult(transformed)
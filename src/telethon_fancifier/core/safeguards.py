@@ -1,30 +1,42 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 from datetime import UTC, datetime
 
+EDIT_WINDOW_SECONDS = 10
+
 
 @dataclass(slots=True)
 class SafeguardResult:
     ok: bool
     reason: str = ""
+    code: str = ""
 
 
 def can_edit_last_message(
     message_id: int,
     last_message_id: int | None,
     message_date: datetime,
-    max_age_seconds: int = 10,
+    max_age_seconds: int = EDIT_WINDOW_SECONDS,
 ) -> SafeguardResult:
     if last_message_id is None:
-        return SafeguardResult(False, "В чате нет последнего сообщения для сравнения")
+        return SafeguardResult(False, "В чате нет последнего сообщения для сравнения", "no_last")
     if message_id != last_message_id:
-        return SafeguardResult(False, "Сообщение уже не является последним")
+        return SafeguardResult(False, "Сообщение уже не является последним", "not_last")
 
-    now = datetime.now(UTC)
-    date_utc = message_date if message_date.tzinfo else message_date.replace(tzinfo=UTC)
-    age = (now - date_utc).total_seconds()
+    age = _message_age(message_date)
     if age > max_age_seconds:
-        return SafeguardResult(False, f"Сообщение старше {max_age_seconds} секунд")
+        return SafeguardResult(False, f"Сообщение старше {max_age_seconds} секунд", "too_old")
 
     return SafeguardResult(True)
+
+
+def edit_deadline(message_date: datetime, max_age_seconds: int = EDIT_WINDOW_SECONDS) -> float:
+    """Абсолютный дедлайн правки по часам ``time.monotonic()``."""
+    return time.monotonic() + max_age_seconds - _message_age(message_date)
+
+
+def _message_age(message_date: datetime) -> float:
+    date_utc = message_date if message_date.tzinfo else message_date.replace(tzinfo=UTC)
+    return (datetime.now(UTC) - date_utc).total_seconds()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from typing import Any
+
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.core.pipeline import CompiledPipeline, PipelineResult
+
+logger = logging.getLogger(__name__)
+
+SpeculationRunner = Callable[
+    [CompiledPipeline, int, str], Coroutine[Any, Any, PipelineResult]
+]
+
+
+@dataclass(slots=True)
+class _Speculation:
+    text: str
+    pipeline: CompiledPipeline
+    task: asyncio.Task[PipelineResult]
+    used: bool = False
+
+
+class DraftSpeculator:
+    """Заранее прогоняет черновик через цепочку чата, пока пользователь печатает.
+
+    На чат хранится одна спекуляция — по последнему черновику, который не менялся
+    ``debounce`` секунд. Когда приходит отправленное сообщение с тем же текстом и той
+    же цепочкой, ``take`` отдаёт готовый (или ещё считающийся) результат. Спекуляции,
+    результат которых так и не пригодился, считаются в ``speculation.wasted``.
+    """
+
+    def __init__(self, runner: SpeculationRunner, debounce: float, metrics: Metrics) -> None:
+        self._runner = runner
+        self._debounce = debounce
+        self._metrics = metrics
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._speculations: dict[int, _Speculation] = {}
+
+    def on_draft(self, chat_id: int, pipeline: CompiledPipeline, text: str) -> None:
+        """Новый текст черновика; пустой текст означает, что черновик очищен."""
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        text = text.strip()
+        if not text:
+            return
+        current = self._speculations.get(chat_id)
+        if current is not None and current.text == text and current.pipeline is pipeline:
+            return
+        loop = asyncio.get_running_loop()
+        self._timers[chat_id] = loop.call_later(
+            self._debounce, self._start, chat_id, pipeline, text
+        )
+
+    def _start(self, chat_id: int, pipeline: CompiledPipeline, text: str) -> None:
+        self._timers.pop(chat_id, None)
+        self._discard(chat_id)
+        self._metrics.incr("speculation.started")
+        task = asyncio.create_task(self._runner(pipeline, chat_id, text))
+        task.add_done_callback(_retrieve_exception)
+        self._speculations[chat_id] = _Speculation(text=text, pipeline=pipeline, task=task)
+
+    def _discard(self, chat_id: int) -> None:
+        speculation = self._speculations.pop(chat_id, None)
+        if speculation is None or speculation.used:
+            return
+        if not speculation.task.done():
+            speculation.task.cancel()
+            self._metrics.incr("speculation.cancelled")
+        else:
+            self._metrics.incr("speculation.wasted")
+
+    async def take(
+        self, chat_id: int, pipeline: CompiledPipeline, text: str
+    ) -> PipelineResult | None:
+        """Результат спекуляции для отправленного текста или None (промах)."""
+        speculation = self._speculations.get(chat_id)
+        if (
+            speculation is None
+            or speculation.used
+            or speculation.text != text.strip()
+            or speculation.pipeline is not pipeline
+        ):
+            self._record(hit=False)
+            return None
+
+        speculation.used = True
+        try:
+            # shield: отмена обработки сообщения не должна отменять общую задачу
+            result = await asyncio.shield(speculation.task)
+        except asyncio.CancelledError:
+            if not speculation.task.cancelled():
+                raise
+            self._record(hit=False)
+            return None
+        except Exception:
+            logger.exception("[speculation] chat=%s: ошибка спекулятивного прогона", chat_id)
+            self._record(hit=False)
+            return None
+        if not result.completed:
+            self._record(hit=False)
+            return None
+        self._record(hit=True)
+        return result
+
+    def _record(self, hit: bool) -> None:
+        self._metrics.incr("speculation.hits" if hit else "speculation.misses")
+        hits = self._metrics.counter("speculation.hits")
+        total = hits + self._metrics.counter("speculation.misses")
+        self._metrics.set_gauge("speculation.hit_rate", hits / total)
+
+    def close(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for chat_id in list(self._speculations):
+            self._discard(chat_id)
+
+
+def _retrieve_exception(task: asyncio.Task[PipelineResult]) -> None:
+    # Неиспользованная спекуляция с ошибкой не должна давать "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import queue
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from multiprocessing.context import SpawnProcess
+from pathlib import Path
+from typing import Any
+
+from telethon_fancifier.config.schema import AccountConfig
+from telethon_fancifier.config.store import ConfigStore
+from telethon_fancifier.config.watcher import ConfigWatcher
+from telethon_fancifier.core.account import ClientFactory, default_client_factory
+from telethon_fancifier.core.daemon import DaemonOptions, FancifierDaemon
+
+logger = logging.getLogger(__name__)
+
+_RELOAD = "reload"
+_STOP = "stop"
+_MAX_RESTART_DELAY = 30.0
+
+
+def shard_accounts(accounts: list[AccountConfig], workers: int) -> list[list[AccountConfig]]:
+    """Раскладывает аккаунты по воркерам по кругу; пустые шарды не создаются."""
+    shards: list[list[AccountConfig]] = [[] for _ in range(max(1, workers))]
+    for index, account in enumerate(accounts):
+        shards[index % len(shards)].append(account)
+    return [shard for shard in shards if shard]
+
+
+@dataclass(slots=True)
+class _WorkerSlot:
+    index: int
+    accounts: list[AccountConfig]
+    process: SpawnProcess | None = None
+    control: Connection | None = None
+    restarts: int = 0
+    restart_at: float = 0.0
+    stats: dict[str, Any] = field(default_factory=dict)
+    stats_at: float = 0.0
+
+
+def _worker_main(
+    index: int,
+    accounts: list[AccountConfig],
+    options: DaemonOptions,
+    config_path: Path,
+    external_plugins_dir: Path | None,
+    control: Connection,
+    stats_queue: multiprocessing.Queue[tuple[int, dict[str, Any]]],
+    client_factory: ClientFactory,
+) -> None:
+    from telethon_fancifier.core.logging_setup import configure_logging
+
+    configure_logging()
+    asyncio.run(
+        _worker_async(
+            index,
+            accounts,
+            options,
+            config_path,
+            external_plugins_dir,
+            control,
+            stats_queue,
+            client_factory,
+        )
+    )
+
+
+async def _worker_async(
+    index: int,
+    accounts: list[AccountConfig],
+    options: DaemonOptions,
+    config_path: Path,
+    external_plugins_dir: Path | None,
+    control: Connection,
+    stats_queue: multiprocessing.Queue[tuple[int, dict[str, Any]]],
+    client_factory: ClientFactory,
+) -> None:
+    from telethon_fancifier.plugins import build_builtin_registry
+    from telethon_fancifier.plugins.loader import load_external_plugins
+
+    store = ConfigStore(config_path)
+    config = store.load()
+    registry = build_builtin_registry(config)
+    if external_plugins_dir is not None:
+        load_external_plugins(registry, external_plugins_dir)
+
+    daemon = FancifierDaemon(
+        config=config,
+        registry=registry,
+        options=options,
+        external_plugins_dir=external_plugins_dir,
+        enable_hot_reload=False,
+        accounts=accounts,
+        client_factory=client_factory,
+        config_store=store,
+    )
+
+    async def control_loop() -> None:
+        while True:
+            has_message = await asyncio.to_thread(control.poll, 0.5)
+            if not has_message:
+                continue
+            command = control.recv()
+            if command == _RELOAD:
+                await daemon.reload_config()
+            elif command == _STOP:
+                await daemon.shutdown()
+                return
+
+    async def stats_loop() -> None:
+        while True:
+            stats_queue.put((index, daemon.stats()))
+            interval = daemon.snapshot.config.runtime.stats_interval_seconds
+            await asyncio.sleep(interval if interval > 0 else 5.0)
+
+    helpers = [asyncio.create_task(control_loop()), asyncio.create_task(stats_loop())]
+    try:
+        await daemon.run()
+    finally:
+        for task in helpers:
+            task.cancel()
+        stats_queue.put((index, daemon.stats()))
+
+
+class ShardSupervisor:
+    """Распределяет аккаунты по N процессам, каждый со своим ``FancifierDaemon``.
+
+    Супервизор перезапускает упавшие воркеры (с экспоненциальной задержкой), рассылает
+    им команду перезагрузки конфига и собирает их метрики в одном месте.
+    """
+
+    def __init__(
+        self,
+        accounts: list[AccountConfig],
+        workers: int,
+        options: DaemonOptions,
+        config_path: Path,
+        external_plugins_dir: Path | None = None,
+        enable_hot_reload: bool = True,
+        client_factory: ClientFactory = default_client_factory,
+        check_interval: float = 1.0,
+    ) -> None:
+        self._options = options
+        self._config_path = config_path
+        self._external_plugins_dir = external_plugins_dir
+        self._client_factory = client_factory
+        self._check_interval = check_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._stats_queue: multiprocessing.Queue[tuple[int, dict[str, Any]]] = (
+            self._context.Queue()
+        )
+        self._slots = [
+            _WorkerSlot(index=index, accounts=shard)
+            for index, shard in enumerate(shard_accounts(accounts, workers))
+        ]
+        self._stopping = False
+        self._config_watcher: ConfigWatcher | None = None
+        if enable_hot_reload:
+            self._config_watcher = ConfigWatcher(config_path)
+            self._config_watcher.add_callback(self.broadcast_reload)
+
+    @property
+    def worker_count(self) -> int:
+        return len(self._slots)
+
+    def start_workers(self) -> None:
+        for slot in self._slots:
+            self._spawn(slot)
+
+    def broadcast_reload(self) -> None:
+        logger.info("[supervisor] рассылка перезагрузки конфига воркерам")
+        self._send_all(_RELOAD)
+
+    def collect_stats(self) -> None:
+        while True:
+            try:
+                index, stats = self._stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            slot = self._slots[index]
+            slot.stats = stats
+            slot.stats_at = time.monotonic()
+
+    def stats(self) -> dict[str, object]:
+        self.collect_stats()
+        workers: dict[int, object] = {}
+        total_depth = 0.0
+        for slot in self._slots:
+            daemon_stats = slot.stats.get("daemon", {})
+            depth = daemon_stats.get("gauges", {}).get("dispatch.queue_depth", 0.0)
+            total_depth += depth
+            workers[slot.index] = {
+                "pid": slot.process.pid if slot.process is not None else None,
+                "alive": slot.process is not None and slot.process.is_alive(),
+                "restarts": slot.restarts,
+                "accounts": [account.session_name for account in slot.accounts],
+                "queue_depth": depth,
+                "dispatch_wait": daemon_stats.get("timings", {}).get("dispatch.wait"),
+                "stats": slot.stats,
+            }
+        return {"workers": workers, "queue_depth": total_depth}
+
+    def check_workers(self) -> None:
+        """Перезапускает завершившиеся воркеры, если супервизор не останавливается."""
+        if self._stopping:
+            return
+        now = time.monotonic()
+        for slot in self._slots:
+            process = slot.process
+            if process is None:
+                if now >= slot.restart_at:
+                    self._spawn(slot)
+                continue
+            if process.is_alive():
+                continue
+
+            logger.warning(
+                "[supervisor] воркер %s (pid=%s) завершился с кодом %s, перезапуск",
+                slot.index,
+                process.pid,
+                process.exitcode,
+            )
+            process.close()
+            if slot.control is not None:
+                slot.control.close()
+                slot.control = None
+            slot.process = None
+            slot.restarts += 1
+            slot.restart_at = now + min(2.0 ** (slot.restarts - 1), _MAX_RESTART_DELAY)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        self._stopping = True
+        self._send_all(_STOP)
+        deadline = time.monotonic() + timeout
+        for slot in self._slots:
+            process = slot.process
+            if process is None:
+                continue
+            await asyncio.to_thread(process.join, max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                await asyncio.to_thread(process.join, 1.0)
+        self.collect_stats()
+
+    async def run(self) -> None:
+        if self._config_watcher is not None:
+            await self._config_watcher.start()
+        self.start_workers()
+        logger.info(
+            "[supervisor] запущено воркеров: %s. Нажмите Ctrl+C для остановки.", self.worker_count
+        )
+        stats_interval = 60.0
+        last_stats = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(self._check_interval)
+                self.collect_stats()
+                self.check_workers()
+                if time.monotonic() - last_stats >= stats_interval:
+                    last_stats = time.monotonic()
+                    logger.info("[supervisor-stats] %s", self.stats())
+        finally:
+            if self._config_watcher is not None:
+                await self._config_watcher.stop()
+            await self.stop()
+            logger.info("[supervisor-stats] %s", self.stats())
+
+    def _spawn(self, slot: _WorkerSlot) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                slot.index,
+                slot.accounts,
+                self._options,
+                self._config_path,
+                self._external_plugins_dir,
+                child_conn,
+                self._stats_queue,
+                self._client_factory,
+            ),
+            # Не daemon: воркеру может понадобиться свой пул процессов для cpu_bound-модулей
+            name=f"fancifier-shard-{slot.index}",
+        )
+        process.start()
+        child_conn.close()
+        slot.process = process
+        slot.control = parent_conn
+        logger.info(
+            "[supervisor] воркер %s запущен (pid=%s, аккаунты: %s)",
+            slot.index,
+            process.pid,
+            ", ".join(account.session_name for account in slot.accounts),
+        )
+
+    def _send_all(self, command: str) -> None:
+        for slot in self._slots:
+            if slot.control is None or slot.process is None or not slot.process.is_alive():
+                continue
+            try:
+                slot.control.send(command)
+            except (BrokenPipeError, OSError):
+                logger.warning("[supervisor] воркер %s недоступен для команды", slot.index)
@@ -1,13 +1,5 @@
 from __future__ import annotations
 
-MDV2_SPECIAL_CHARS = r"_*[]()~`>#+-=|{}.!"
+from telethon_fancifier.core.text_kernels import MDV2_SPECIAL_CHARS, escape_markdown_v2
 
-
-def escape_markdown_v2(text: str) -> str:
-    escaped: list[str] = []
-    for ch in text:
-        if ch in MDV2_SPECIAL_CHARS:
-            escaped.append("\\" + ch)
-        else:
-            escaped.append(ch)
-    return "".join(escaped)
+__all__ = ["MDV2_SPECIAL_CHARS", "escape_markdown_v2"]
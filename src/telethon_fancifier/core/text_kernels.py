@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+from collections.abc import Callable
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+MDV2_SPECIAL_CHARS = r"_*[]()~`>#+-=|{}.!"
+
+_MDV2_REPLACEMENTS = tuple((ch, "\\" + ch) for ch in MDV2_SPECIAL_CHARS)
+
+
+def _escape_markdown_v2_py(text: str) -> str:
+    # Цепочка str.replace по встречающимся спецсимволам идёт на C-уровне и на кириллице
+    # заметно быстрее str.translate, которому нужен поиск в словаре на каждый символ
+    for special, escaped in _MDV2_REPLACEMENTS:
+        if special in text:
+            text = text.replace(special, escaped)
+    return text
+
+
+def _alternate_case_py(text: str) -> str:
+    chars: list[str] = []
+    append = chars.append
+    odd = False
+    for ch in text:
+        if ch.isalpha():
+            append(ch.upper() if odd else ch.lower())
+            odd = not odd
+        else:
+            append(ch)
+    return "".join(chars)
+
+
+def _bold_letters_py(text: str, picks: bytes) -> str:
+    """Оборачивает в ``*...*`` буквы на позициях, где ``picks[i]`` равен 1.
+
+    Не-буквы на отмеченных позициях пропускаются. Python-код выполняется только для
+    отмеченных позиций, остальной текст копируется срезами.
+    """
+    pieces: list[str] = []
+    start = 0
+    position = picks.find(1)
+    while position != -1:
+        ch = text[position]
+        if ch.isalpha():
+            pieces.append(text[start:position])
+            pieces.append(f"*{ch}*")
+            start = position + 1
+        position = picks.find(1, position + 1)
+    if not pieces:
+        return text
+    pieces.append(text[start:])
+    return "".join(pieces)
+
+
+def pick_table(probability: float) -> bytes:
+    """Таблица для ``bytes.translate``: случайный байт -> 1 с вероятностью ``probability``."""
+    threshold = round(min(max(probability, 0.0), 1.0) * 256)
+    return bytes(1 if value < threshold else 0 for value in range(256))
+
+
+def _load_speedups() -> ModuleType | None:
+    if os.getenv("TELETHON_FANCIFIER_NO_SPEEDUPS"):
+        return None
+    try:
+        return importlib.import_module("telethon_fancifier._speedups")
+    except ImportError:
+        return None
+
+
+def _kernel[F: Callable[..., object]](name: str, fallback: F) -> F:
+    implementation = getattr(_speedups, name, None)
+    return implementation if callable(implementation) else fallback
+
+
+# Необязательный скомпилированный модуль telethon_fancifier._speedups может подменить
+# любое из ядер функцией с той же сигнатурой; без него работает чистый Python
+_speedups = _load_speedups()
+ACCELERATED = _speedups is not None
+if ACCELERATED:
+    logger.debug("[text-kernels] используется telethon_fancifier._speedups")
+
+escape_markdown_v2 = _kernel("escape_markdown_v2", _escape_markdown_v2_py)
+alternate_case = _kernel("alternate_case", _alternate_case_py)
+bold_letters = _kernel("bold_letters", _bold_letters_py)
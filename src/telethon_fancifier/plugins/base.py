@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Protocol
 
@@ -9,11 +11,63 @@ class PluginContext:
     chat_id: int
     message_id: int
     dry_run: bool
+    deadline: float | None = None
+    # Промежуточный результат последнего шага цепочки (для постепенной правки сообщения)
+    on_partial: Callable[[str], None] | None = None
+
+    def remaining(self) -> float | None:
+        """Секунды до дедлайна правки (по ``time.monotonic()``) или None без дедлайна."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+EXECUTION_ASYNC = "async"
+EXECUTION_BLOCKING = "blocking"
+EXECUTION_CPU_BOUND = "cpu_bound"
 
 
 class Plugin(Protocol):
+    """Интерфейс модуля.
+
+    Необязательный атрибут ``execution``: ``"blocking"`` или ``"cpu_bound"`` — тогда модуль
+    обязан иметь синхронный ``transform_sync(text, context) -> str``, и демон выполнит его
+    в пуле потоков или процессов, не блокируя event loop.
+
+    Необязательный атрибут ``pure = True`` объявляет модуль чистой функцией текста: результат
+    не зависит от контекста, времени и случайности. Такие шаги демон берёт из кеша.
+
+    Необязательный атрибут ``per_message = True`` объявляет, что результат зависит от
+    ``message_id`` (например, зерно случайности). Спекуляция по черновику останавливается
+    перед первым таким модулем, остаток цепочки досчитывается по отправленному сообщению.
+
+    Необязательные корутины ``start()`` и ``aclose()`` демон вызывает при запуске и
+    остановке (прогрев и закрытие соединений), а ``stats() -> dict`` попадает в его метрики.
+    """
+
     plugin_id: str
     title: str
 
     async def transform(self, text: str, context: PluginContext) -> str:
         ...
+
+
+def plugin_is_pure(plugin: Plugin) -> bool:
+    return getattr(plugin, "pure", False) is True
+
+
+def plugin_is_per_message(plugin: Plugin) -> bool:
+    return getattr(plugin, "per_message", False) is True
+
+
+def plugin_execution(plugin: Plugin) -> str:
+    execution = getattr(plugin, "execution", EXECUTION_ASYNC)
+    if execution in (EXECUTION_BLOCKING, EXECUTION_CPU_BOUND) and callable(
+        getattr(plugin, "transform_sync", None)
+    ):
+        return str(execution)
+    return EXECUTION_ASYNC
@@ -1,29 +1,73 @@
 from __future__ import annotations
 
+import math
+import time
+
 from telethon_fancifier.config.schema import LlmConfig
 from telethon_fancifier.config.store import ConfigStore
 from telethon_fancifier.plugins.base import PluginContext
 from telethon_fancifier.providers.base import BaseLlmProvider, LlmRequest
 
+REVALIDATE_INTERVAL_SECONDS = 1.0
+
 
 class LlmRewritePlugin:
     plugin_id = "llm_rewrite"
     title = "LLM Rewrite (DeepSeek)"
 
-    def __init__(self, provider: BaseLlmProvider, llm_config: LlmConfig | None = None) -> None:
+    def __init__(
+        self,
+        provider: BaseLlmProvider,
+        llm_config: LlmConfig | None = None,
+        config_store: ConfigStore | None = None,
+        revalidate_interval: float = REVALIDATE_INTERVAL_SECONDS,
+    ) -> None:
         self._provider = provider
         self._llm_config = llm_config
-        self._config_store = ConfigStore() if llm_config is None else None
+        # Without explicit settings the plugin follows config.json itself, but only
+        # stat()s it at most once per interval and re-reads it when the file changed
+        self._config_store = (config_store or ConfigStore()) if llm_config is None else None
+        self._revalidate_interval = revalidate_interval
+        self._revision: tuple[int, int, int] | None = None
+        self._checked_at = -math.inf
+
+    def update_llm_config(self, llm_config: LlmConfig) -> None:
+        """Подменяет настройки LLM без пересоздания провайдера и его HTTP-соединений."""
+        self._llm_config = llm_config
+        self._config_store = None
+
+    async def start(self) -> None:
+        start = getattr(self._provider, "start", None)
+        if callable(start):
+            await start()
+
+    async def aclose(self) -> None:
+        aclose = getattr(self._provider, "aclose", None)
+        if callable(aclose):
+            await aclose()
+
+    def stats(self) -> dict[str, object]:
+        stats = getattr(self._provider, "stats", None)
+        return stats() if callable(stats) else {}
+
+    def _current_llm_config(self) -> LlmConfig:
+        store = self._config_store
+        if store is None:
+            assert self._llm_config is not None
+            return self._llm_config
+
+        now = time.monotonic()
+        if self._llm_config is not None and now - self._checked_at < self._revalidate_interval:
+            return self._llm_config
+        self._checked_at = now
+        revision = store.revision()
+        if self._llm_config is None or revision != self._revision:
+            self._llm_config = store.load().llm
+            self._revision = revision
+        return self._llm_config
 
     async def transform(self, text: str, context: PluginContext) -> str:
-        # Reload config on each transform to see LLM setting changes when running in daemon
-        # If llm_config was explicitly provided (e.g., in tests), use that instead
-        if self._llm_config is not None:
-            llm_config = self._llm_config
-        else:
-            config = self._config_store.load()  # type: ignore[union-attr]
-            llm_config = config.llm
-        
+        llm_config = self._current_llm_config()
         prompt = llm_config.get_active_prompt()
         return await self._provider.rewrite(
             LlmRequest(
@@ -34,5 +78,7 @@ class LlmRewritePlugin:
                 temperature=prompt.temperature,
                 model=llm_config.model,
                 api_style=llm_config.api_style,
+                timeout=context.remaining(),
+                on_partial=context.on_partial,
             )
         )
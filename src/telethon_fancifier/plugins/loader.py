@@ -20,6 +20,20 @@ def _load_module_from_path(path: Path) -> ModuleType:
     return module
 
 
+def external_plugins_signature(plugins_dir: Path) -> tuple[tuple[str, int, int], ...]:
+    """Имена, mtime и размеры файлов модулей: дешёвая проверка, нужен ли повторный импорт."""
+    if not plugins_dir.exists():
+        return ()
+    signature: list[tuple[str, int, int]] = []
+    for file in sorted(plugins_dir.glob("*.py")):
+        try:
+            stat = file.stat()
+        except OSError:
+            continue
+        signature.append((file.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
 def load_external_plugins(registry: PluginRegistry, plugins_dir: Path) -> None:
     if not plugins_dir.exists():
         return
@@ -30,7 +44,7 @@ def load_external_plugins(registry: PluginRegistry, plugins_dir: Path) -> None:
             factory: Any = getattr(module, "get_plugin", None)
             if callable(factory):
                 plugin = factory()
-                registry.register(plugin)
+                registry.register(plugin, source=file)
                 logger.info("Загружен внешний модуль: %s", file.name)
             else:
                 logger.warning("Пропуск внешнего модуля без get_plugin(): %s", file.name)
@@ -1,24 +1,52 @@
 from __future__ import annotations
 
-import random
+import hashlib
+import logging
 
-from telethon_fancifier.core.telegram_markdown import escape_markdown_v2
+from telethon_fancifier.core.text_kernels import bold_letters, escape_markdown_v2, pick_table
 from telethon_fancifier.plugins.base import PluginContext
 
+logger = logging.getLogger(__name__)
+
+
+def message_seed(chat_id: int, message_id: int, seed: int | None = None) -> int:
+    """Стабильное между запусками зерно сообщения (``hash()`` строк рандомизирован)."""
+    key = f"{chat_id}:{message_id}" if seed is None else f"{seed}:{chat_id}:{message_id}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def random_bytes(seed: int, length: int) -> bytes:
+    """Детерминированный поток случайных байтов по зерну, одним вызовом.
+
+    SHAKE-256 вместо ``random.Random(seed)``: инициализация вихря Мерсенна на каждое
+    сообщение дороже, чем обработка короткого сообщения целиком.
+    """
+    return hashlib.shake_256(seed.to_bytes(8, "big")).digest(length)
+
 
 class RandomBoldPlugin:
     plugin_id = "random_bold"
     title = "Случайный жирный markdown"
+    per_message = True
 
-    def __init__(self, probability: float = 0.18) -> None:
+    def __init__(self, probability: float = 0.18, seed: int | None = None) -> None:
         self._probability = probability
+        self._seed = seed
+        self._pick_table = pick_table(probability)
 
     async def transform(self, text: str, context: PluginContext) -> str:
         escaped = escape_markdown_v2(text)
-        result: list[str] = []
-        for ch in escaped:
-            if ch.isalpha() and random.random() < self._probability:
-                result.append(f"*{ch}*")
-            else:
-                result.append(ch)
-        return "".join(result)
+        # Один генератор на сообщение: одно и то же сообщение всегда выделяется одинаково
+        seed = message_seed(context.chat_id, context.message_id, self._seed)
+        if context.dry_run:
+            logger.info(
+                "[dry-run] random_bold chat=%s msg=%s seed=%s",
+                context.chat_id,
+                context.message_id,
+                seed,
+            )
+        # Все позиции разыгрываются одним вызовом: байт на позицию, буква выделяется
+        # с вероятностью probability
+        picks = random_bytes(seed, len(escaped)).translate(self._pick_table)
+        return bold_letters(escaped, picks)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 from telethon_fancifier.plugins.base import Plugin
 from telethon_fancifier.core.errors import AppError
 
@@ -7,9 +9,14 @@ from telethon_fancifier.core.errors import AppError
 class PluginRegistry:
     def __init__(self) -> None:
         self._plugins: dict[str, Plugin] = {}
+        self._sources: dict[str, Path] = {}
 
-    def register(self, plugin: Plugin) -> None:
+    def register(self, plugin: Plugin, source: Path | None = None) -> None:
         self._plugins[plugin.plugin_id] = plugin
+        if source is None:
+            self._sources.pop(plugin.plugin_id, None)
+        else:
+            self._sources[plugin.plugin_id] = source
 
     def get(self, plugin_id: str) -> Plugin:
         plugin = self._plugins.get(plugin_id)
@@ -22,3 +29,13 @@ class PluginRegistry:
 
     def all(self) -> list[Plugin]:
         return [self._plugins[key] for key in self.all_ids()]
+
+    def copy(self, include_external: bool = True) -> PluginRegistry:
+        """Новый реестр с теми же объектами модулей (без внешних, если так задано)."""
+        clone = PluginRegistry()
+        for plugin_id, plugin in self._plugins.items():
+            source = self._sources.get(plugin_id)
+            if source is not None and not include_external:
+                continue
+            clone.register(plugin, source)
+        return clone
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import logging
+from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Protocol
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(slots=True)
 class LlmRequest:
@@ -13,8 +17,49 @@ class LlmRequest:
     temperature: float | None = None
     model: str = ""
     api_style: str = "chat_completions"
+    timeout: float | None = None
+    # Если задан, провайдер стримит ответ и передаёт сюда накопленный текст по мере прихода
+    on_partial: Callable[[str], None] | None = None
+    # Попросить модель вернуть JSON-объект (structured output)
+    json_output: bool = False
+
+
+class LlmProviderError(Exception):
+    """Запрос к LLM не дал ответа. ``retryable`` — имеет ли смысл повторить запрос."""
+
+    def __init__(self, message: str, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.retryable = retryable
 
 
 class BaseLlmProvider(Protocol):
     async def rewrite(self, request: LlmRequest) -> str:
         ...
+
+
+class LlmBackend(BaseLlmProvider, Protocol):
+    """Провайдер, который, помимо ``rewrite``, сообщает об ошибке исключением.
+
+    На ``complete`` строятся обёртки (кеш, повторы, хеджирование): им нужно отличать
+    ответ модели от возврата исходного текста при сбое.
+    """
+
+    async def complete(self, request: LlmRequest) -> str:
+        ...
+
+
+def format_user_prompt(template: str, text: str) -> str:
+    try:
+        return template.format(text=text)
+    except (ValueError, KeyError, IndexError):
+        return template + text
+
+
+async def complete_or_original(backend: LlmBackend, request: LlmRequest) -> str:
+    """``rewrite`` поверх ``complete``: при ошибке возвращает исходный текст."""
+    try:
+        return await backend.complete(request)
+    except LlmProviderError as exc:
+        logger.info("[llm] %s, возвращен исходный текст", exc)
+        logger.info("[llm] result: %s", request.text)
+        return request.text
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field, replace
+
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.providers.base import (
+    LlmBackend,
+    LlmProviderError,
+    LlmRequest,
+    complete_or_original,
+    format_user_prompt,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_INSTRUCTIONS = (
+    "\n\nYou will receive a JSON array of independent messages. Apply the instructions above "
+    "to each message separately. Answer only with a JSON object of the form "
+    '{"results": ["...", "..."]} containing exactly one result string per message, '
+    "in the same order."
+)
+
+_GroupKey = tuple[str, str, str, str, float | None]
+
+
+@dataclass(slots=True)
+class _Pending:
+    request: LlmRequest
+    future: asyncio.Future[str]
+    enqueued_at: float
+    deadline: float
+
+
+@dataclass(slots=True)
+class _Batch:
+    items: list[_Pending] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+def _group_key(request: LlmRequest) -> _GroupKey:
+    return (
+        request.model,
+        request.api_style,
+        request.system_prompt,
+        request.user_prompt_template,
+        request.temperature,
+    )
+
+
+def parse_batch_results(content: str, expected: int) -> list[str]:
+    """Разбирает ответ пачки; ValueError, если формат или число ответов не совпали."""
+    text = content.strip()
+    if text.startswith("```"):
+        # Модель могла обернуть JSON в markdown-блок
+        text = text.strip("`")
+        text = text.removeprefix("json").strip()
+    data = json.loads(text)
+    results = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(results, list) or len(results) != expected:
+        raise ValueError("число ответов в пачке не совпадает с числом сообщений")
+    if not all(isinstance(item, str) for item in results):
+        raise ValueError("ответ пачки содержит не строки")
+    return [item.strip() for item in results]
+
+
+class BatchingProvider:
+    """Собирает одинаково настроенные запросы за короткое окно в один запрос к LLM.
+
+    Запросы с одной моделью, API-стилем и промптом, пришедшие в течение ``window``
+    секунд (или до ``max_batch_size`` штук), отправляются одним запросом с JSON-ответом
+    и раскладываются обратно по сообщениям. Если ответ пачки не разобрался или запрос
+    упал, каждое сообщение переотправляется отдельно. Таймаут пачки — по самому позднему
+    дедлайну участников; участник, чей дедлайн истёк раньше, получает ошибку один.
+    Стриминговые запросы не копятся.
+    """
+
+    def __init__(self, inner: LlmBackend, window: float = 0.15, max_batch_size: int = 8) -> None:
+        self._inner = inner
+        self._window = window
+        self._max_batch_size = max(1, max_batch_size)
+        self._batches: dict[_GroupKey, _Batch] = {}
+        self._flushes: set[asyncio.Task[None]] = set()
+        self.metrics = Metrics()
+
+    async def rewrite(self, request: LlmRequest) -> str:
+        return await complete_or_original(self, request)
+
+    async def complete(self, request: LlmRequest) -> str:
+        if request.on_partial is not None or request.json_output:
+            return await self._inner.complete(request)
+
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        pending = _Pending(
+            request=request,
+            future=loop.create_future(),
+            enqueued_at=now,
+            deadline=now + request.timeout if request.timeout is not None else math.inf,
+        )
+        key = _group_key(request)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.timer = loop.call_later(self._window, self._flush, key)
+        batch.items.append(pending)
+        if len(batch.items) >= self._max_batch_size:
+            self._flush(key)
+        return await pending.future
+
+    def _flush(self, key: _GroupKey) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        items = [item for item in batch.items if not item.future.done()]
+        if not items:
+            return
+        task = asyncio.create_task(self._send(items))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _send(self, items: list[_Pending]) -> None:
+        try:
+            await self._send_batch(items)
+        finally:
+            # Пачку отменили при остановке: ожидающие не должны висеть вечно
+            for item in items:
+                if not item.future.done():
+                    item.future.cancel()
+
+    async def _send_batch(self, items: list[_Pending]) -> None:
+        now = time.monotonic()
+        for item in items:
+            self.metrics.observe("batching.window_wait", now - item.enqueued_at)
+        self.metrics.observe("batching.size", len(items))
+
+        if len(items) == 1:
+            await self._send_single(items[0])
+            return
+
+        self.metrics.incr("batching.batches")
+        first = items[0].request
+        # Пачка ждёт до самого позднего дедлайна, а участники с ранним дедлайном
+        # отваливаются по своему таймеру, не утягивая за собой всю пачку
+        deadline = max(item.deadline for item in items)
+        loop = asyncio.get_running_loop()
+        expiries = [
+            loop.call_later(item.deadline - now, self._expire, item)
+            for item in items
+            if item.deadline != math.inf
+        ]
+        try:
+            messages = [
+                format_user_prompt(item.request.user_prompt_template, item.request.text)
+                for item in items
+            ]
+            batch_request = replace(
+                first,
+                text=json.dumps(messages, ensure_ascii=False),
+                chat_id=0,
+                system_prompt=first.system_prompt + BATCH_INSTRUCTIONS,
+                user_prompt_template="{text}",
+                timeout=deadline - now if deadline != math.inf else None,
+                json_output=True,
+            )
+            try:
+                content = await self._inner.complete(batch_request)
+                results = parse_batch_results(content, len(items))
+            except (LlmProviderError, ValueError) as exc:
+                self.metrics.incr("batching.fallbacks")
+                logger.warning(
+                    "[llm-batch] пачка из %s не удалась (%s), отправка по одному", len(items), exc
+                )
+                await asyncio.gather(*(self._send_single(item) for item in items))
+                return
+
+            for item, result in zip(items, results):
+                if not item.future.done():
+                    item.future.set_result(result)
+        finally:
+            for expiry in expiries:
+                expiry.cancel()
+
+    def _expire(self, item: _Pending) -> None:
+        if not item.future.done():
+            self.metrics.incr("batching.expired")
+            item.future.set_exception(
+                LlmProviderError("дедлайн истёк в ожидании пачки", retryable=True)
+            )
+
+    async def _send_single(self, item: _Pending) -> None:
+        if item.future.done():
+            return
+        remaining = item.deadline - time.monotonic()
+        request = replace(item.request, timeout=remaining if item.deadline != math.inf else None)
+        try:
+            result = await self._inner.complete(request)
+        except Exception as exc:  # noqa: BLE001
+            if not item.future.done():
+                item.future.set_exception(exc)
+        else:
+            if not item.future.done():
+                item.future.set_result(result)
+
+    async def start(self) -> None:
+        start = getattr(self._inner, "start", None)
+        if callable(start):
+            await start()
+
+    async def aclose(self) -> None:
+        for batch in self._batches.values():
+            if batch.timer is not None:
+                batch.timer.cancel()
+            for item in batch.items:
+                item.future.cancel()
+        self._batches.clear()
+        for task in list(self._flushes):
+            task.cancel()
+        aclose = getattr(self._inner, "aclose", None)
+        if callable(aclose):
+            await aclose()
+
+    def stats(self) -> dict[str, object]:
+        inner_stats = getattr(self._inner, "stats", None)
+        return {
+            "batching": self.metrics.snapshot(),
+            "inner": inner_stats() if callable(inner_stats) else {},
+        }
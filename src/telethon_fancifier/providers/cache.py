@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.providers.base import LlmBackend, LlmRequest, complete_or_original
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(provider: str, request: LlmRequest) -> str:
+    """Ключ кеша: всё, от чего зависит ответ модели, включая полный текст промптов."""
+    material = json.dumps(
+        [
+            provider,
+            request.model,
+            request.api_style,
+            request.system_prompt,
+            request.user_prompt_template,
+            request.temperature,
+            request.text,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(request: LlmRequest) -> bool:
+    # None — температура по умолчанию у провайдера, а она не нулевая
+    return request.temperature is not None and request.temperature == 0
+
+
+class _SqliteCache:
+    """Синхронное хранилище; вызывается из рабочего потока через ``asyncio.to_thread``."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str, min_stored_at: float) -> tuple[str, float] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM llm_cache WHERE key = ? AND stored_at >= ?",
+                (key, min_stored_at),
+            ).fetchone()
+        return (str(row[0]), float(row[1])) if row is not None else None
+
+    def put(self, key: str, value: str, stored_at: float, max_entries: int) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, stored_at),
+            )
+            # Храним не больше max_entries самых свежих ответов
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN "
+                "(SELECT key FROM llm_cache ORDER BY stored_at DESC LIMIT ?)",
+                (max_entries,),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class CachingProvider:
+    """Кеш ответов LLM перед провайдером: LRU в памяти с TTL и, по желанию, SQLite.
+
+    Кешируются только детерминированные запросы (``temperature == 0``); ошибки провайдера
+    не кешируются. Время хранения считается по часам стены, чтобы записи из SQLite
+    корректно устаревали и после перезапуска.
+    """
+
+    def __init__(
+        self,
+        inner: LlmBackend,
+        provider_name: str,
+        max_entries: int = 1000,
+        ttl: float = 7 * 24 * 3600.0,
+        db_path: Path | None = None,
+    ) -> None:
+        self._inner = inner
+        self._provider_name = provider_name
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._store = _SqliteCache(db_path) if db_path is not None else None
+        self.metrics = Metrics()
+
+    async def rewrite(self, request: LlmRequest) -> str:
+        return await complete_or_original(self, request)
+
+    async def complete(self, request: LlmRequest) -> str:
+        if not is_deterministic(request):
+            self.metrics.incr("cache.bypass")
+            return await self._inner.complete(request)
+
+        key = cache_key(self._provider_name, request)
+        cached = await self._lookup(key)
+        if cached is not None:
+            self.metrics.incr("cache.hits")
+            logger.info("[llm-cache] hit: %s", cached)
+            return cached
+
+        self.metrics.incr("cache.misses")
+        result = await self._inner.complete(request)
+        await self._remember(key, result)
+        return result
+
+    async def _lookup(self, key: str) -> str | None:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if now - entry[1] <= self._ttl:
+                self._memory.move_to_end(key)
+                return entry[0]
+            del self._memory[key]
+            self.metrics.incr("cache.expired")
+
+        if self._store is None:
+            return None
+        stored = await asyncio.to_thread(self._store.get, key, now - self._ttl)
+        if stored is None:
+            return None
+        self._put_memory(key, stored[0], stored[1])
+        return stored[0]
+
+    async def _remember(self, key: str, value: str) -> None:
+        now = time.time()
+        self._put_memory(key, value, now)
+        if self._store is not None:
+            try:
+                await asyncio.to_thread(self._store.put, key, value, now, self._max_entries)
+            except sqlite3.Error:
+                logger.exception("[llm-cache] не удалось записать ответ в SQLite")
+
+    def _put_memory(self, key: str, value: str, stored_at: float) -> None:
+        self._memory[key] = (value, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self.metrics.incr("cache.evicted")
+
+    async def start(self) -> None:
+        start = getattr(self._inner, "start", None)
+        if callable(start):
+            await start()
+
+    async def aclose(self) -> None:
+        aclose = getattr(self._inner, "aclose", None)
+        if callable(aclose):
+            await aclose()
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def stats(self) -> dict[str, object]:
+        self.metrics.set_gauge("cache.size", len(self._memory))
+        hits = self.metrics.counter("cache.hits")
+        lookups = hits + self.metrics.counter("cache.misses")
+        self.metrics.set_gauge("cache.hit_rate", hits / lookups if lookups else 0.0)
+        inner_stats = getattr(self._inner, "stats", None)
+        return {
+            "cache": self.metrics.snapshot(),
+            "inner": inner_stats() if callable(inner_stats) else {},
+        }
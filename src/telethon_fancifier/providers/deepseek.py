@@ -1,36 +1,169 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
+import json
 import logging
 import os
+import time
+from collections.abc import Awaitable, Callable
 from typing import Any
 
 import httpx
 
-from telethon_fancifier.providers.base import LlmRequest
+from telethon_fancifier.config.schema import HttpClientConfig
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.providers.base import (
+    LlmProviderError,
+    LlmRequest,
+    complete_or_original,
+    format_user_prompt,
+)
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TIMEOUT_SECONDS = 20.0
+WARMUP_TIMEOUT_SECONDS = 5.0
+
+_Trace = Callable[[str, dict[str, Any]], Awaitable[None]]
+
 
 class DeepSeekProvider:
-    def __init__(self) -> None:
+    """Клиент DeepSeek API с одним долгоживущим пулом соединений.
+
+    ``httpx.AsyncClient`` создаётся при первом запросе и переиспользуется, так что DNS,
+    TCP и TLS оплачиваются один раз. ``start()`` прогревает соединение и запускает пинг
+    после простоя, ``aclose()`` закрывает пул. Через trace-расширение httpx считается,
+    сколько запросов ушло по уже открытому соединению.
+    """
+
+    def __init__(
+        self,
+        http_config: HttpClientConfig | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        base_url: str | None = None,
+    ) -> None:
         self._api_key = os.getenv("DEEPSEEK_API_KEY", "")
-        self._base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+        self._base_url = (
+            base_url or os.getenv("DEEPSEEK_BASE_URL", "") or "https://api.deepseek.com"
+        )
         self._model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
+        self._http_config = http_config if http_config is not None else HttpClientConfig()
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._ping_task: asyncio.Task[None] | None = None
+        self._last_used = 0.0
+        self.metrics = Metrics()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            config = self._http_config
+            http2 = config.http2
+            if http2 and importlib.util.find_spec("h2") is None:
+                logger.warning("[llm] пакет h2 не установлен, HTTP/2 отключён")
+                http2 = False
+            self._client = httpx.AsyncClient(
+                base_url=self._base_url,
+                headers={"Authorization": f"Bearer {self._api_key}"},
+                timeout=DEFAULT_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_keepalive_connections,
+                    keepalive_expiry=config.keepalive_expiry_seconds,
+                ),
+                http2=http2,
+                transport=self._transport,
+            )
+        return self._client
+
+    def _trace(self) -> _Trace:
+        """Trace-колбэк одного запроса: отличает новое соединение от переиспользованного."""
+        self.metrics.incr("http.requests")
+        state = {"opened": False}
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                state["opened"] = True
+                self.metrics.incr("http.connections_opened")
+            elif event_name.endswith("send_request_headers.started") and not state["opened"]:
+                self.metrics.incr("http.connections_reused")
+
+        return trace
+
+    async def start(self) -> None:
+        """Прогрев соединения и фоновый пинг после простоя (если включены в конфиге)."""
+        if not self._api_key:
+            return
+        if self._http_config.warmup:
+            await self.warmup()
+        if self._http_config.idle_ping_seconds > 0 and self._ping_task is None:
+            self._ping_task = asyncio.create_task(self._idle_ping_loop(), name="llm-idle-ping")
+
+    async def warmup(self) -> None:
+        """Открывает соединение лёгким запросом к ``/models``; ошибки не критичны."""
+        if not self._api_key:
+            return
+        started = time.perf_counter()
+        try:
+            response = await self._get_client().get(
+                "/models",
+                timeout=WARMUP_TIMEOUT_SECONDS,
+                extensions={"trace": self._trace()},
+            )
+            self._last_used = time.monotonic()
+            self.metrics.incr("http.warmups")
+            logger.info(
+                "[llm] соединение прогрето за %.0f мс (HTTP %s)",
+                (time.perf_counter() - started) * 1000,
+                response.status_code,
+            )
+        except httpx.HTTPError as exc:
+            logger.warning("[llm] прогрев соединения не удался: %s", exc)
+
+    async def _idle_ping_loop(self) -> None:
+        interval = self._http_config.idle_ping_seconds
+        while True:
+            idle = time.monotonic() - self._last_used
+            if idle < interval:
+                await asyncio.sleep(interval - idle)
+                continue
+            await self.warmup()
+            if time.monotonic() - self._last_used >= interval:
+                # Прогрев не удался: не долбим API чаще, чем раз в интервал
+                await asyncio.sleep(interval)
+
+    async def aclose(self) -> None:
+        if self._ping_task is not None:
+            self._ping_task.cancel()
+            await asyncio.gather(self._ping_task, return_exceptions=True)
+            self._ping_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict[str, object]:
+        return self.metrics.snapshot()
 
     async def rewrite(self, request: LlmRequest) -> str:
-        user_prompt = self._format_user_prompt(request.user_prompt_template, request.text)
+        return await complete_or_original(self, request)
+
+    async def complete(self, request: LlmRequest) -> str:
+        user_prompt = format_user_prompt(request.user_prompt_template, request.text)
 
         if not self._api_key:
             logger.info("[llm] query: %s", user_prompt)
-            logger.info("[llm] result: %s", request.text)
-            logger.info("DEEPSEEK_API_KEY не задан, llm_rewrite вернул исходный текст")
-            return request.text
+            raise LlmProviderError("DEEPSEEK_API_KEY не задан")
+
+        timeout = DEFAULT_TIMEOUT_SECONDS
+        if request.timeout is not None:
+            if request.timeout <= 0:
+                raise LlmProviderError("бюджет времени исчерпан, запрос не отправлен")
+            timeout = min(timeout, request.timeout)
 
         model = request.model or self._model
         api_style = request.api_style or "chat_completions"
         logger.info("[llm] query: %s", user_prompt)
 
-        headers = {"Authorization": f"Bearer {self._api_key}"}
         endpoint, payload = self._build_payload(
             model=model,
             api_style=api_style,
@@ -39,37 +172,104 @@ class DeepSeekProvider:
             temperature=request.temperature,
         )
         if endpoint is None or payload is None:
-            logger.error("Неподдерживаемый API-стиль для модели: %s", api_style)
-            logger.info("[llm] result: %s", request.text)
-            return request.text
+            raise LlmProviderError(f"неподдерживаемый API-стиль для модели: {api_style}")
+        if request.json_output:
+            if api_style == "responses":
+                payload["text"] = {"format": {"type": "json_object"}}
+            else:
+                payload["response_format"] = {"type": "json_object"}
 
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
-                response = await client.post(
-                    f"{self._base_url}/{endpoint}",
-                    headers=headers,
-                    json=payload,
-                )
-                response.raise_for_status()
-                data = response.json()
-                if api_style == "responses":
-                    content = self._extract_responses_content(data)
+            started = time.perf_counter()
+            async with asyncio.timeout(timeout):
+                if request.on_partial is not None:
+                    content = await self._stream(
+                        endpoint, payload, api_style, timeout, request.on_partial
+                    )
                 else:
-                    content = data["choices"][0]["message"]["content"]
+                    response = await self._get_client().post(
+                        f"/{endpoint}",
+                        json=payload,
+                        timeout=timeout,
+                        extensions={"trace": self._trace()},
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+                    if api_style == "responses":
+                        content = self._extract_responses_content(data)
+                    else:
+                        content = data["choices"][0]["message"]["content"]
+                self._last_used = time.monotonic()
+                self.metrics.observe("http.request", time.perf_counter() - started)
                 rewritten = str(content).strip()
                 logger.info("[llm] result: %s", rewritten)
                 return rewritten
-        except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError):
-            logger.exception("Ошибка запроса к DeepSeek, возвращен исходный текст")
-            logger.info("[llm] result: %s", request.text)
-            return request.text
+        except asyncio.CancelledError:
+            # Newer message superseded this one: the pending HTTP request is aborted with the task
+            logger.info("[llm] запрос отменён")
+            raise
+        except TimeoutError as exc:
+            raise LlmProviderError(f"таймаут {timeout:.1f} с", retryable=True) from exc
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            logger.warning("[llm] DeepSeek ответил HTTP %s", status)
+            raise LlmProviderError(
+                f"ошибка HTTP {status}", retryable=status == 429 or status >= 500
+            ) from exc
+        except httpx.HTTPError as exc:
+            logger.warning("[llm] сетевая ошибка DeepSeek: %r", exc)
+            raise LlmProviderError(f"сетевая ошибка: {exc!r}", retryable=True) from exc
+        except (KeyError, IndexError, TypeError, ValueError) as exc:
+            logger.exception("Некорректный ответ DeepSeek")
+            raise LlmProviderError("некорректный ответ DeepSeek") from exc
+
+    async def _stream(
+        self,
+        endpoint: str,
+        payload: dict[str, object],
+        api_style: str,
+        timeout: float,
+        on_partial: Callable[[str], None],
+    ) -> str:
+        """Читает ответ как server-sent events, отдавая накопленный текст в ``on_partial``."""
+        started = time.perf_counter()
+        parts: list[str] = []
+        async with self._get_client().stream(
+            "POST",
+            f"/{endpoint}",
+            json={**payload, "stream": True},
+            timeout=timeout,
+            extensions={"trace": self._trace()},
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                delta = self._extract_stream_delta(json.loads(data), api_style)
+                if not delta:
+                    continue
+                if not parts:
+                    self.metrics.observe("llm.first_token", time.perf_counter() - started)
+                parts.append(delta)
+                on_partial("".join(parts))
+        if not parts:
+            raise ValueError("пустой потоковый ответ")
+        return "".join(parts)
 
     @staticmethod
-    def _format_user_prompt(template: str, text: str) -> str:
-        try:
-            return template.format(text=text)
-        except (ValueError, KeyError):
-            return template + text
+    def _extract_stream_delta(event: dict[str, Any], api_style: str) -> str:
+        if api_style == "responses":
+            if event.get("type") == "response.output_text.delta":
+                return str(event.get("delta", ""))
+            return ""
+        choices = event.get("choices") or []
+        if not choices:
+            return ""
+        content = (choices[0].get("delta") or {}).get("content")
+        return str(content) if content else ""
 
     @staticmethod
     def _build_payload(
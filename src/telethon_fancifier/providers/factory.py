@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from telethon_fancifier.config.paths import get_data_dir
+from telethon_fancifier.config.schema import AppConfig
+from telethon_fancifier.providers.base import LlmBackend
+from telethon_fancifier.providers.batching import BatchingProvider
+from telethon_fancifier.providers.cache import CachingProvider
+from telethon_fancifier.providers.deepseek import DeepSeekProvider
+from telethon_fancifier.providers.hedging import HedgingProvider
+from telethon_fancifier.providers.resilience import ResilientProvider
+
+LLM_CACHE_FILENAME = "llm_cache.sqlite3"
+
+
+def build_llm_provider(config: AppConfig | None = None) -> LlmBackend:
+    """Собирает провайдер LLM со всеми обёртками, включёнными в конфиге."""
+    config = config if config is not None else AppConfig()
+    hedging = config.hedging
+    provider: LlmBackend
+    if hedging.enabled and len(hedging.base_urls) > 1:
+        provider = HedgingProvider(
+            [DeepSeekProvider(config.http, base_url=url) for url in hedging.base_urls],
+            percentile=hedging.percentile,
+            initial_delay=hedging.initial_delay_seconds,
+            min_delay=hedging.min_delay_seconds,
+            max_delay=hedging.max_delay_seconds,
+        )
+    else:
+        base_url = hedging.base_urls[0] if hedging.base_urls else None
+        provider = DeepSeekProvider(config.http, base_url=base_url)
+
+    resilience = config.resilience
+    if resilience.enabled:
+        provider = ResilientProvider(
+            provider,
+            max_attempts=resilience.max_attempts,
+            backoff_base=resilience.backoff_base_seconds,
+            backoff_max=resilience.backoff_max_seconds,
+            failure_threshold=resilience.failure_threshold,
+            open_seconds=resilience.open_seconds,
+            half_open_probes=resilience.half_open_probes,
+        )
+
+    batching = config.batching
+    if batching.enabled:
+        provider = BatchingProvider(
+            provider, window=batching.window_seconds, max_batch_size=batching.max_batch_size
+        )
+
+    cache = config.llm_cache
+    if cache.enabled:
+        provider = CachingProvider(
+            provider,
+            provider_name=config.llm.provider,
+            max_entries=cache.max_entries,
+            ttl=cache.ttl_seconds,
+            db_path=get_data_dir() / LLM_CACHE_FILENAME if cache.persist else None,
+        )
+    return provider
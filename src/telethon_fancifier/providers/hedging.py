@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import replace
+
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.providers.base import (
+    LlmBackend,
+    LlmProviderError,
+    LlmRequest,
+    complete_or_original,
+)
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class HedgingProvider:
+    """Хеджирование запросов по нескольким бэкендам (адресам API).
+
+    Запрос уходит в первый бэкенд; если ответа нет дольше перцентиля недавних задержек,
+    параллельно отправляется резервный запрос в следующий. Берётся первый успешный
+    ответ, остальные запросы отменяются. Ошибка бэкенда сразу запускает следующий.
+    Промежуточный вывод (стриминг) получает только основной запрос.
+    """
+
+    def __init__(
+        self,
+        backends: list[LlmBackend],
+        percentile: float = 95.0,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.3,
+        max_delay: float = 5.0,
+    ) -> None:
+        if not backends:
+            raise ValueError("HedgingProvider requires at least one backend")
+        self._backends = backends
+        self._percentile = percentile
+        self._initial_delay = initial_delay
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.metrics = Metrics()
+
+    def hedge_delay(self) -> float:
+        if len(self._latencies) < MIN_SAMPLES:
+            return self._initial_delay
+        delay = percentile(list(self._latencies), self._percentile)
+        return min(max(delay, self._min_delay), self._max_delay)
+
+    async def rewrite(self, request: LlmRequest) -> str:
+        return await complete_or_original(self, request)
+
+    async def complete(self, request: LlmRequest) -> str:
+        started = time.monotonic()
+        delay = self.hedge_delay()
+        self.metrics.incr("hedging.requests")
+        self.metrics.set_gauge("hedging.delay", delay)
+
+        tasks: dict[asyncio.Task[str], int] = {}
+        next_index = 0
+        next_launch = started
+        error: LlmProviderError | None = None
+
+        def launch() -> None:
+            nonlocal next_index, next_launch
+            elapsed = time.monotonic() - started
+            attempt = request
+            if next_index > 0:
+                timeout = request.timeout - elapsed if request.timeout is not None else None
+                attempt = replace(request, on_partial=None, timeout=timeout)
+            task = asyncio.create_task(self._backends[next_index].complete(attempt))
+            tasks[task] = next_index
+            next_index += 1
+            next_launch = time.monotonic() + delay
+
+        launch()
+        try:
+            while tasks:
+                can_hedge = next_index < len(self._backends)
+                wait = max(0.0, next_launch - time.monotonic()) if can_hedge else None
+                done, _ = await asyncio.wait(
+                    tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.metrics.incr("hedging.hedged")
+                    logger.info("[llm-hedge] нет ответа за %.2f с, резервный запрос", delay)
+                    launch()
+                    continue
+
+                winner: asyncio.Task[str] | None = None
+                for task in done:
+                    index = tasks.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        if winner is None:
+                            winner = task
+                            self._record_win(index, time.monotonic() - started)
+                        continue
+                    if not isinstance(exc, LlmProviderError):
+                        raise exc
+                    error = exc
+                    self.metrics.incr(f"hedging.errors.{index}")
+                if winner is not None:
+                    return winner.result()
+                if next_index < len(self._backends):
+                    # Бэкенд ответил ошибкой: следующий запускаем сразу, не дожидаясь задержки
+                    launch()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                self.metrics.incr("hedging.cancelled", len(tasks))
+
+        assert error is not None
+        raise error
+
+    def _record_win(self, index: int, latency: float) -> None:
+        self._latencies.append(latency)
+        self.metrics.incr(f"hedging.wins.{index}")
+        self.metrics.observe("hedging.latency", latency)
+        requests = self.metrics.counter("hedging.requests")
+        hedged = self.metrics.counter("hedging.hedged")
+        self.metrics.set_gauge("hedging.hedge_rate", hedged / requests)
+
+    async def start(self) -> None:
+        for backend in self._backends:
+            start = getattr(backend, "start", None)
+            if callable(start):
+                await start()
+
+    async def aclose(self) -> None:
+        for backend in self._backends:
+            aclose = getattr(backend, "aclose", None)
+            if callable(aclose):
+                await aclose()
+
+    def stats(self) -> dict[str, object]:
+        return {"hedging": self.metrics.snapshot()}
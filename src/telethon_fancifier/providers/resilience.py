@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import replace
+
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.providers.base import (
+    LlmBackend,
+    LlmProviderError,
+    LlmRequest,
+    complete_or_original,
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_STATE_GAUGE = {STATE_CLOSED: 0.0, STATE_HALF_OPEN: 1.0, STATE_OPEN: 2.0}
+
+
+class CircuitBreaker:
+    """Размыкатель: после ``failure_threshold`` сбоев подряд запросы не отправляются.
+
+    Через ``open_seconds`` размыкатель пропускает до ``half_open_probes`` пробных
+    запросов; успех замыкает цепь, сбой снова размыкает её.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        open_seconds: float,
+        half_open_probes: int,
+        metrics: Metrics,
+    ) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._open_seconds = open_seconds
+        self._half_open_probes = max(1, half_open_probes)
+        self._metrics = metrics
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.state = STATE_CLOSED
+        metrics.set_gauge("breaker.state", _STATE_GAUGE[self.state])
+
+    def allow(self) -> bool:
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self._opened_at < self._open_seconds:
+                return False
+            self._transition(STATE_HALF_OPEN)
+        if self.state == STATE_HALF_OPEN:
+            if self._probes >= self._half_open_probes:
+                return False
+            self._probes += 1
+        return True
+
+    def release(self) -> None:
+        """Пробный запрос завершился без вердикта (отмена, неповторяемая ошибка)."""
+        if self.state == STATE_HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != STATE_CLOSED:
+            self._transition(STATE_CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == STATE_HALF_OPEN or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+            if self.state != STATE_OPEN:
+                self._transition(STATE_OPEN)
+
+    def _transition(self, state: str) -> None:
+        logger.warning("[llm-breaker] %s -> %s (сбоев подряд: %s)", self.state, state, self._failures)
+        self.state = state
+        self._probes = 0
+        self._metrics.incr(f"breaker.{state}")
+        self._metrics.set_gauge("breaker.state", _STATE_GAUGE[state])
+
+
+class ResilientProvider:
+    """Повторы с экспоненциальной задержкой и full jitter плюс размыкатель цепи.
+
+    Повторяются только ошибки с ``retryable=True`` и только пока остаётся бюджет
+    времени запроса. Пока цепь разомкнута, запрос сразу завершается ошибкой, и
+    ``rewrite`` без ожидания возвращает исходный текст.
+    """
+
+    def __init__(
+        self,
+        inner: LlmBackend,
+        max_attempts: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ) -> None:
+        self._inner = inner
+        self._max_attempts = max(1, max_attempts)
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self.metrics = Metrics()
+        self.breaker = CircuitBreaker(
+            failure_threshold, open_seconds, half_open_probes, self.metrics
+        )
+
+    async def rewrite(self, request: LlmRequest) -> str:
+        return await complete_or_original(self, request)
+
+    async def complete(self, request: LlmRequest) -> str:
+        started = time.monotonic()
+        for attempt in range(self._max_attempts):
+            if not self.breaker.allow():
+                self.metrics.incr("resilience.short_circuited")
+                raise LlmProviderError("цепь разомкнута после серии сбоев, запрос не отправлен")
+
+            remaining = _remaining(request, started)
+            try:
+                result = await self._inner.complete(replace(request, timeout=remaining))
+            except LlmProviderError as exc:
+                if not exc.retryable:
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                self.metrics.incr("resilience.failures")
+                delay = random.uniform(0, min(self._backoff_max, self._backoff_base * 2**attempt))
+                remaining = _remaining(request, started)
+                if attempt + 1 >= self._max_attempts or (
+                    remaining is not None and remaining <= delay
+                ):
+                    raise
+                self.metrics.incr("resilience.retries")
+                logger.info("[llm] повтор через %.2f с: %s", delay, exc)
+                await asyncio.sleep(delay)
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    async def start(self) -> None:
+        start = getattr(self._inner, "start", None)
+        if callable(start):
+            await start()
+
+    async def aclose(self) -> None:
+        aclose = getattr(self._inner, "aclose", None)
+        if callable(aclose):
+            await aclose()
+
+    def stats(self) -> dict[str, object]:
+        inner_stats = getattr(self._inner, "stats", None)
+        return {
+            "resilience": self.metrics.snapshot(),
+            "inner": inner_stats() if callable(inner_stats) else {},
+        }
+
+
+def _remaining(request: LlmRequest, started: float) -> float | None:
+    if request.timeout is None:
+        return None
+    return request.timeout - (time.monotonic() - started)
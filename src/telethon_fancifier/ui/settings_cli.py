@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import replace
 from typing import Callable
 
 from telethon import TelegramClient
@@ -362,7 +363,11 @@ async def _run_add_or_edit_chats_wizard(config: AppConfig, registry: PluginRegis
         else:
             order = [plugin_ids[i] for i in chosen]
 
-        updates.append(ChatConfig(chat_id=chat_id, title=title, plugin_order=order))
+        if existing is None:
+            updates.append(ChatConfig(chat_id=chat_id, title=title, plugin_order=order))
+        else:
+            # Остальные настройки чата (например, latest_wins) мастер не спрашивает
+            updates.append(replace(existing, title=title, plugin_order=order))
 
     config.chats = merge_chat_configs(config.chats, updates)
     _print_config_summary(config)
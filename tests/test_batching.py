@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from telethon_fancifier.providers.base import LlmRequest
+from telethon_fancifier.providers.batching import BatchingProvider, parse_batch_results
+
+
+class UpperBackend:
+    """Отвечает на пачку JSON-объектом, на одиночный запрос — текстом в верхнем регистре."""
+
+    def __init__(self, broken_batches: bool = False, batch_delay: float = 0.0) -> None:
+        self.requests: list[LlmRequest] = []
+        self.broken_batches = broken_batches
+        self.batch_delay = batch_delay
+
+    async def complete(self, request: LlmRequest) -> str:
+        self.requests.append(request)
+        if request.json_output:
+            await asyncio.sleep(self.batch_delay)
+            if self.broken_batches:
+                return "не JSON"
+            messages = json.loads(request.text)
+            return json.dumps({"results": [message.upper() for message in messages]})
+        return request.text.upper()
+
+
+def test_parse_batch_results_accepts_fenced_json_and_checks_length() -> None:
+    assert parse_batch_results('```json\n{"results": ["a", "b"]}\n```', 2) == ["a", "b"]
+    with pytest.raises(ValueError):
+        parse_batch_results('{"results": ["a"]}', 2)
+
+
+@pytest.mark.asyncio
+async def test_requests_within_window_share_one_call() -> None:
+    backend = UpperBackend()
+    provider = BatchingProvider(backend, window=0.05)
+
+    results = await asyncio.gather(
+        provider.rewrite(LlmRequest(text="ok", chat_id=1, temperature=0.0)),
+        provider.rewrite(LlmRequest(text="спасибо", chat_id=2, temperature=0.0)),
+        provider.rewrite(LlmRequest(text="other", chat_id=3, system_prompt="другой промпт")),
+    )
+
+    assert results == ["OK", "СПАСИБО", "OTHER"]
+    assert len(backend.requests) == 2
+    assert provider.metrics.counter("batching.batches") == 1
+    assert provider.metrics.timing("batching.size").max == 2
+
+
+@pytest.mark.asyncio
+async def test_unparseable_batch_falls_back_to_single_requests() -> None:
+    backend = UpperBackend(broken_batches=True)
+    provider = BatchingProvider(backend, window=0.05, max_batch_size=2)
+
+    results = await asyncio.gather(
+        provider.rewrite(LlmRequest(text="a", chat_id=1)),
+        provider.rewrite(LlmRequest(text="b", chat_id=2)),
+    )
+
+    assert results == ["A", "B"]
+    assert [request.json_output for request in backend.requests] == [True, False, False]
+    assert provider.metrics.counter("batching.fallbacks") == 1
+
+
+@pytest.mark.asyncio
+async def test_short_deadline_item_does_not_time_out_whole_batch() -> None:
+    backend = UpperBackend(batch_delay=0.2)
+    provider = BatchingProvider(backend, window=0.01, max_batch_size=2)
+
+    results = await asyncio.gather(
+        provider.rewrite(LlmRequest(text="a", chat_id=1, timeout=0.1)),
+        provider.rewrite(LlmRequest(text="b", chat_id=2, timeout=5.0)),
+    )
+
+    # Сообщение с коротким дедлайном остаётся как было, остальная пачка отвечает
+    assert results == ["a", "B"]
+    assert len(backend.requests) == 1
+    assert backend.requests[0].timeout is not None and backend.requests[0].timeout > 4
+    assert provider.metrics.counter("batching.expired") == 1
+    assert provider.metrics.counter("batching.fallbacks") == 0
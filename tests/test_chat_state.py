@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from telethon_fancifier.core.chat_state import ChatStateTable
+
+
+def test_chat_state_tracks_last_message() -> None:
+    table = ChatStateTable(max_entries=10, ttl=20)
+    table.touch(1, 10)
+    table.touch(1, 11)
+
+    assert table.last_message_id(1) == 11
+    assert table.last_message_id(2) is None
+    assert len(table) == 1
+
+
+def test_chat_state_evicts_idle_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    table = ChatStateTable(max_entries=10, ttl=20)
+    table.touch(1, 10)
+    table.touch(2, 20)
+
+    now[0] += 30
+    table.touch(3, 30)
+
+    assert len(table) == 1
+    assert table.last_message_id(1) is None
+    assert table.evicted == 2
+
+
+def test_chat_state_keeps_fresh_entries_over_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    table = ChatStateTable(max_entries=2, ttl=20)
+    for chat_id in range(3):
+        table.touch(chat_id, chat_id)
+
+    assert len(table) == 3
+
+    now[0] += 30
+    table.touch(4, 4)
+
+    assert len(table) == 1
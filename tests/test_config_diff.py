@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import copy
+
+from telethon_fancifier.config.diff import diff_configs
+from telethon_fancifier.config.schema import AppConfig, ChatConfig, LlmPromptConfig
+
+
+def _config() -> AppConfig:
+    return AppConfig(
+        chats=[
+            ChatConfig(chat_id=1, title="A", plugin_order=["every_second_upper"]),
+            ChatConfig(chat_id=2, title="B", plugin_order=["random_bold"]),
+        ]
+    )
+
+
+def test_diff_of_equal_configs_is_empty() -> None:
+    config = _config()
+    diff = diff_configs(config, copy.deepcopy(config))
+
+    assert diff.empty
+    assert diff.summary() == "без изменений"
+
+
+def test_diff_reports_added_removed_and_changed_chats() -> None:
+    old = _config()
+    new = copy.deepcopy(old)
+    new.chats[0].plugin_order.append("random_bold")
+    del new.chats[1]
+    new.chats.append(ChatConfig(chat_id=3, title="C", plugin_order=["random_bold"]))
+
+    diff = diff_configs(old, new)
+
+    assert diff.changed_chats == {1}
+    assert diff.removed_chats == {2}
+    assert diff.added_chats == {3}
+    assert diff.rebuild_chats == {1, 3}
+    assert not diff.llm_changed
+
+
+def test_diff_reports_changed_prompts() -> None:
+    old = _config()
+    new = copy.deepcopy(old)
+    new.llm.prompts["formal"] = LlmPromptConfig(system_prompt="x", user_prompt_template="{text}")
+
+    diff = diff_configs(old, new)
+
+    assert diff.llm_changed
+    assert diff.prompts_changed == {"formal"}
+    assert not diff.rebuild_chats
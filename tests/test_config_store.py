@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from telethon_fancifier.config.schema import AppConfig, ChatConfig
+from telethon_fancifier.config.store import ConfigStore, config_content_hash
+
+
+def test_save_stamps_generation_and_skips_unchanged_content(tmp_path: Path) -> None:
+    store = ConfigStore(tmp_path / "config.json")
+    config = AppConfig(chats=[ChatConfig(chat_id=1, title="A", plugin_order=["random_bold"])])
+
+    store.save(config)
+    payload = json.loads(store.path.read_text(encoding="utf-8"))
+    assert payload["generation"] == 1
+    assert payload["content_hash"] == config_content_hash(payload)
+    mtime = store.path.stat().st_mtime_ns
+
+    store.save(config)
+    assert store.path.stat().st_mtime_ns == mtime
+
+    config.chats[0].plugin_order.append("every_second_upper")
+    store.save(config)
+    assert store.generation == 2
+    assert [item.name for item in tmp_path.iterdir()] == ["config.json"]
+
+
+def test_save_keeps_file_mode(tmp_path: Path) -> None:
+    umask = os.umask(0o022)
+    try:
+        store = ConfigStore(tmp_path / "config.json")
+        store.save(AppConfig(chats=[ChatConfig(chat_id=1, title="A")]))
+        assert store.path.stat().st_mode & 0o777 == 0o644
+
+        store.path.chmod(0o640)
+        store.save(AppConfig(chats=[ChatConfig(chat_id=2, title="B")]))
+        assert store.path.stat().st_mode & 0o777 == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_load_returns_independent_copies_and_sees_external_edits(tmp_path: Path) -> None:
+    store = ConfigStore(tmp_path / "config.json")
+    store.save(AppConfig(chats=[ChatConfig(chat_id=1, title="A")]))
+
+    first = store.load()
+    first.chats.clear()
+    assert len(store.load().chats) == 1
+
+    payload = json.loads(store.path.read_text(encoding="utf-8"))
+    payload["chats"].append({"chat_id": 2, "title": "B", "plugin_order": []})
+    store.path.write_text(json.dumps(payload), encoding="utf-8")
+
+    assert [chat.chat_id for chat in ConfigStore(store.path).load().chats] == [1, 2]
+    assert [chat.chat_id for chat in store.load().chats] == [1, 2]
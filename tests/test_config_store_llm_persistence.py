@@ -24,3 +24,28 @@ def test_config_store_persists_custom_llm_prompts(tmp_path) -> None:
     assert loaded.llm.prompts["glitch"].system_prompt == "glitch-system"
     assert loaded.llm.prompts["glitch"].user_prompt_template == "glitch-user: {text}"
     assert loaded.llm.prompts["glitch"].temperature == 0.8
+
+
+def test_config_store_persists_runtime_settings(tmp_path) -> None:
+    store = ConfigStore()
+    store._path = tmp_path / "config.json"
+
+    config = AppConfig()
+    config.runtime.max_workers = 12
+    config.runtime.chat_queue_size = 3
+
+    store.save(config)
+    loaded = store.load()
+
+    assert loaded.runtime.max_workers == 12
+    assert loaded.runtime.chat_queue_size == 3
+
+
+def test_config_store_defaults_runtime_for_legacy_file(tmp_path) -> None:
+    store = ConfigStore()
+    store._path = tmp_path / "config.json"
+    store._path.write_text('{"schema_version": 1, "chats": []}', encoding="utf-8")
+
+    loaded = store.load()
+
+    assert loaded.runtime.max_workers == AppConfig().runtime.max_workers
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from telethon_fancifier.config.inotify import InotifyWatch
+from telethon_fancifier.config.watcher import ConfigWatcher
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+async def _run_writes(watcher: ConfigWatcher, path: Path, settle: float) -> list[int]:
+    calls: list[int] = []
+    watcher.add_callback(lambda: calls.append(1))
+    await watcher.start()
+    try:
+        # Пачка записей подряд даёт одну перезагрузку
+        for index in range(5):
+            _atomic_write(path, f'{{"n": {index}}}')
+        await asyncio.sleep(settle)
+        assert len(calls) == 1
+
+        # Перезапись тем же содержимым перезагрузку не вызывает
+        _atomic_write(path, '{"n": 4}')
+        await asyncio.sleep(settle)
+        assert len(calls) == 1
+    finally:
+        await watcher.stop()
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_inotify_watcher_debounces_and_ignores_same_content(tmp_path: Path) -> None:
+    probe = InotifyWatch.open(tmp_path)
+    if probe is None:
+        pytest.skip("inotify недоступен")
+    probe.close()
+
+    path = tmp_path / "config.json"
+    path.write_text("{}", encoding="utf-8")
+    watcher = ConfigWatcher(path, debounce=0.05)
+
+    await _run_writes(watcher, path, settle=0.3)
+
+
+@pytest.mark.asyncio
+async def test_polling_fallback_detects_atomic_rename(tmp_path: Path) -> None:
+    path = tmp_path / "config.json"
+    path.write_text("{}", encoding="utf-8")
+    watcher = ConfigWatcher(path, check_interval=0.05, use_inotify=False)
+
+    calls: list[int] = []
+    watcher.add_callback(lambda: calls.append(1))
+    await watcher.start()
+    try:
+        assert watcher.mode == "polling"
+        _atomic_write(path, '{"n": 1}')
+        await asyncio.sleep(0.3)
+        assert calls == [1]
+    finally:
+        await watcher.stop()
@@ -0,0 +1,546 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+import pytest
+from telethon import events
+from telethon.tl import types
+
+from telethon_fancifier.config.schema import AccountConfig, AppConfig, ChatConfig
+from telethon_fancifier.config.store import ConfigStore
+from telethon_fancifier.core.daemon import DaemonOptions, FancifierDaemon, resolve_accounts
+from telethon_fancifier.core.safeguards import EDIT_WINDOW_SECONDS
+from telethon_fancifier.plugins.base import PluginContext
+from telethon_fancifier.plugins.every_second_upper import EverySecondUpperPlugin
+from telethon_fancifier.plugins.llm_rewrite import LlmRewritePlugin
+from telethon_fancifier.plugins.random_bold import RandomBoldPlugin
+from telethon_fancifier.plugins.registry import PluginRegistry
+from telethon_fancifier.providers.base import BaseLlmProvider, LlmRequest
+from telethon_fancifier.providers.deepseek import DeepSeekProvider
+
+
+class StubClient:
+    def __init__(self, account: AccountConfig) -> None:
+        self.account = account
+        self.handlers: list[tuple[Any, Any]] = []
+        self.edits: list[tuple[int, int, str]] = []
+        self.disconnected = asyncio.Event()
+
+    def add_event_handler(self, callback: Any, event: Any) -> None:
+        self.handlers.append((event, callback))
+
+    def remove_event_handler(self, callback: Any, event: Any) -> None:
+        self.handlers = [(ev, cb) for ev, cb in self.handlers if ev is not event]
+
+    async def start(self) -> None:
+        return None
+
+    async def run_until_disconnected(self) -> None:
+        await self.disconnected.wait()
+
+    def is_connected(self) -> bool:
+        return not self.disconnected.is_set()
+
+    async def disconnect(self) -> None:
+        self.disconnected.set()
+
+    async def edit_message(self, chat_id: int, message_id: int, text: str, parse_mode: str) -> None:
+        self.edits.append((chat_id, message_id, text))
+
+    async def emit(
+        self, chat_id: int, message_id: int, text: str, date: datetime | None = None
+    ) -> None:
+        event = SimpleNamespace(
+            chat_id=chat_id,
+            raw_text=text,
+            message=SimpleNamespace(id=message_id, date=date or datetime.now(UTC)),
+        )
+        for builder, callback in list(self.handlers):
+            if isinstance(builder, events.NewMessage) and builder.func(event):
+                await callback(event)
+
+    async def emit_draft(self, chat_id: int, text: str) -> None:
+        update = types.UpdateDraftMessage(
+            peer=types.PeerUser(chat_id),
+            draft=types.DraftMessage(message=text, date=datetime.now(UTC)),
+        )
+        for builder, callback in list(self.handlers):
+            if isinstance(builder, events.Raw):
+                await callback(update)
+
+
+def _config() -> AppConfig:
+    config = AppConfig(
+        chats=[
+            ChatConfig(chat_id=1, title="A", plugin_order=["every_second_upper"]),
+            ChatConfig(chat_id=2, title="B", plugin_order=["every_second_upper"]),
+        ],
+        accounts=[
+            AccountConfig(session_name="first", chat_ids=[1]),
+            AccountConfig(session_name="second"),
+        ],
+    )
+    config.runtime.stats_interval_seconds = 0
+    return config
+
+
+def _registry() -> PluginRegistry:
+    registry = PluginRegistry()
+    registry.register(EverySecondUpperPlugin())
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_daemon_serves_several_accounts_with_shared_registry() -> None:
+    clients: dict[str, StubClient] = {}
+
+    def factory(account: AccountConfig) -> StubClient:
+        clients[account.session_name] = StubClient(account)
+        return clients[account.session_name]
+
+    config = _config()
+    daemon = FancifierDaemon(
+        config=config,
+        registry=_registry(),
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=factory,
+    )
+    run_task = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0)
+
+    await clients["first"].emit(1, 10, "привет")
+    await clients["first"].emit(2, 11, "привет")
+    await clients["second"].emit(2, 12, "привет")
+    for _ in range(50):
+        if clients["first"].edits and clients["second"].edits:
+            break
+        await asyncio.sleep(0.01)
+
+    for client in clients.values():
+        await client.disconnect()
+    await run_task
+
+    assert clients["first"].edits == [(1, 10, "пРиВеТ")]
+    assert clients["second"].edits == [(2, 12, "пРиВеТ")]
+    stats = daemon.stats()["accounts"]
+    assert stats["first"]["counters"]["events.dropped_before_dispatch"] == 1
+    assert stats["second"]["counters"]["edits.sent"] == 1
+
+
+def test_resolve_accounts_falls_back_to_env_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TELEGRAM_SESSION_NAME", "legacy")
+
+    accounts = resolve_accounts(AppConfig())
+
+    assert [account.session_name for account in accounts] == ["legacy"]
+
+
+def test_resolve_accounts_filters_by_name() -> None:
+    accounts = resolve_accounts(_config(), ["second"])
+
+    assert [account.session_name for account in accounts] == ["second"]
+
+
+class _StubProvider(BaseLlmProvider):
+    async def rewrite(self, request: LlmRequest) -> str:
+        return request.text
+
+
+@pytest.mark.asyncio
+async def test_reload_rebuilds_only_changed_chats_and_keeps_provider(tmp_path: Path) -> None:
+    store = ConfigStore(tmp_path / "config.json")
+    config = _config()
+    store.save(config)
+    registry = _registry()
+    llm_plugin = LlmRewritePlugin(provider=_StubProvider(), llm_config=config.llm)
+    registry.register(llm_plugin)
+    daemon = FancifierDaemon(
+        config=store.load(),
+        registry=registry,
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=StubClient,
+        config_store=store,
+    )
+    before = daemon.snapshot
+
+    updated = store.load()
+    updated.chats[1].plugin_order = ["every_second_upper", "llm_rewrite"]
+    updated.llm.model = "deepseek-reasoner"
+    store.save(updated)
+    await daemon.reload_config()
+
+    after = daemon.snapshot
+    assert after.version == before.version + 1
+    assert after.registry is before.registry
+    assert after.get(1) is before.get(1)
+    assert after.get(2) is not before.get(2)
+    assert after.get(2).plugin_ids == ("every_second_upper", "llm_rewrite")  # type: ignore[union-attr]
+    assert llm_plugin._llm_config is not None
+    assert llm_plugin._llm_config.model == "deepseek-reasoner"
+    assert daemon.metrics.timing("config.reload_loop_stall").count == 1
+
+    await daemon.reload_config()
+    assert daemon.snapshot is after
+
+
+class _StreamingPlugin:
+    plugin_id = "streaming"
+    title = "Streaming"
+
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+
+    async def transform(self, text: str, context: Any) -> str:
+        assert context.on_partial is not None
+        context.on_partial(text + " …")
+        await asyncio.sleep(self.delay)
+        return text + " ✨"
+
+
+class _CountingPlugin:
+    plugin_id = "counting"
+    title = "Counting"
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def transform(self, text: str, context: Any) -> str:
+        self.calls.append(text)
+        await asyncio.sleep(0.05)
+        return text.upper()
+
+@pytest.mark.asyncio
+async def test_streaming_pipeline_edits_partial_then_final_text() -> None:
+    clients: dict[str, StubClient] = {}
+
+    def factory(account: AccountConfig) -> StubClient:
+        clients[account.session_name] = StubClient(account)
+        return clients[account.session_name]
+
+    config = AppConfig(
+        chats=[ChatConfig(chat_id=1, title="A", plugin_order=["every_second_upper", "streaming"])],
+        accounts=[AccountConfig(session_name="solo")],
+    )
+    config.runtime.stats_interval_seconds = 0
+    config.runtime.stream_partial_edits = True
+    config.runtime.partial_edit_interval_seconds = 0
+    registry = _registry()
+    registry.register(_StreamingPlugin())
+    daemon = FancifierDaemon(
+        config=config,
+        registry=registry,
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=factory,
+    )
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+
+    await clients["solo"].emit(1, 10, "hello")
+    await asyncio.sleep(0.3)
+    await daemon.shutdown()
+    await runner
+
+    assert clients["solo"].edits == [(1, 10, "hElLo …"), (1, 10, "hElLo ✨")]
+    assert daemon.accounts[0].metrics.counter("edits.partial") == 1
+
+
+def _streaming_daemon(
+    clients: dict[str, StubClient], delay: float, latest_wins: bool = True
+) -> FancifierDaemon:
+    def factory(account: AccountConfig) -> StubClient:
+        clients[account.session_name] = StubClient(account)
+        return clients[account.session_name]
+
+    config = AppConfig(
+        chats=[
+            ChatConfig(
+                chat_id=1, title="A", plugin_order=["streaming"], latest_wins=latest_wins
+            )
+        ],
+        accounts=[AccountConfig(session_name="solo")],
+    )
+    config.runtime.stats_interval_seconds = 0
+    config.runtime.stream_partial_edits = True
+    config.runtime.partial_edit_interval_seconds = 0
+    registry = PluginRegistry()
+    registry.register(_StreamingPlugin(delay))
+    return FancifierDaemon(
+        config=config,
+        registry=registry,
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=factory,
+    )
+
+
+@pytest.mark.asyncio
+async def test_streamed_message_is_restored_when_deadline_expires() -> None:
+    clients: dict[str, StubClient] = {}
+    daemon = _streaming_daemon(clients, delay=0.4)
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+
+    # До конца окна правки остаётся 0.2 с, а модуль работает 0.4 с
+    sent_at = datetime.now(UTC) - timedelta(seconds=EDIT_WINDOW_SECONDS - 0.2)
+    await clients["solo"].emit(1, 10, "hi", date=sent_at)
+    await asyncio.sleep(0.6)
+    await daemon.shutdown()
+    await runner
+
+    assert clients["solo"].edits == [(1, 10, "hi …"), (1, 10, "hi")]
+    metrics = daemon.accounts[0].metrics
+    assert metrics.counter("skips.deadline") == 1
+    assert metrics.counter("edits.restored") == 1
+    assert metrics.counter("edits.dropped_stale") == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_message_is_restored_when_superseded() -> None:
+    clients: dict[str, StubClient] = {}
+    daemon = _streaming_daemon(clients, delay=0.3)
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+
+    await clients["solo"].emit(1, 10, "hi")
+    await asyncio.sleep(0.1)
+    await clients["solo"].emit(1, 11, "bye")
+    await asyncio.sleep(0.5)
+    await daemon.shutdown()
+    await runner
+
+    edits = clients["solo"].edits
+    assert [edit for edit in edits if edit[1] == 10] == [(1, 10, "hi …"), (1, 10, "hi")]
+    assert [edit for edit in edits if edit[1] == 11] == [(1, 11, "bye …"), (1, 11, "bye ✨")]
+    assert daemon.accounts[0].metrics.counter("skips.superseded") == 1
+
+
+@pytest.mark.asyncio
+async def test_streamed_message_is_restored_when_no_longer_last() -> None:
+    clients: dict[str, StubClient] = {}
+    daemon = _streaming_daemon(clients, delay=0.2, latest_wins=False)
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+
+    await clients["solo"].emit(1, 10, "hi")
+    await asyncio.sleep(0.1)
+    await clients["solo"].emit(1, 11, "bye")
+    await asyncio.sleep(0.6)
+    await daemon.shutdown()
+    await runner
+
+    assert clients["solo"].edits == [
+        (1, 10, "hi …"),
+        (1, 10, "hi"),
+        (1, 11, "bye …"),
+        (1, 11, "bye ✨"),
+    ]
+    assert daemon.accounts[0].metrics.counter("skips.not_last") == 1
+
+
+@pytest.mark.asyncio
+async def test_speculative_draft_result_is_used_when_message_is_sent() -> None:
+    clients: dict[str, StubClient] = {}
+
+    def factory(account: AccountConfig) -> StubClient:
+        clients[account.session_name] = StubClient(account)
+        return clients[account.session_name]
+
+    config = AppConfig(
+        chats=[ChatConfig(chat_id=1, title="A", plugin_order=["counting"])],
+        accounts=[AccountConfig(session_name="solo")],
+    )
+    config.runtime.stats_interval_seconds = 0
+    config.runtime.speculative_drafts = True
+    config.runtime.draft_debounce_seconds = 0.01
+    plugin = _CountingPlugin()
+    registry = PluginRegistry()
+    registry.register(plugin)
+    daemon = FancifierDaemon(
+        config=config,
+        registry=registry,
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=factory,
+    )
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+
+    client = clients["solo"]
+    await client.emit_draft(1, "hel")
+    await client.emit_draft(1, "hello")
+    await asyncio.sleep(0.02)
+    await client.emit(1, 10, "hello")
+    await asyncio.sleep(0.1)
+    await client.emit_draft(1, "bye")
+    await asyncio.sleep(0.02)
+    await client.emit(1, 11, "bye now")
+    await asyncio.sleep(0.3)
+    await daemon.shutdown()
+    await runner
+
+    assert client.edits == [(1, 10, "HELLO"), (1, 11, "BYE NOW")]
+    # "hel" вытеснен дебаунсом, "bye" посчитан впустую, "bye now" — промах
+    assert plugin.calls == ["hello", "bye", "bye now"]
+    metrics = daemon.accounts[0].metrics
+    assert metrics.counter("speculation.hits") == 1
+    assert metrics.counter("speculation.misses") == 1
+
+
+@pytest.mark.asyncio
+async def test_speculation_leaves_random_bold_to_the_sent_message() -> None:
+    clients: dict[str, StubClient] = {}
+
+    def factory(account: AccountConfig) -> StubClient:
+        clients[account.session_name] = StubClient(account)
+        return clients[account.session_name]
+
+    config = AppConfig(
+        chats=[
+            ChatConfig(chat_id=1, title="A", plugin_order=["counting", "random_bold"]),
+            ChatConfig(chat_id=2, title="B", plugin_order=["random_bold"]),
+        ],
+        accounts=[AccountConfig(session_name="solo")],
+    )
+    config.runtime.stats_interval_seconds = 0
+    config.runtime.speculative_drafts = True
+    config.runtime.draft_debounce_seconds = 0.01
+    plugin = _CountingPlugin()
+    registry = PluginRegistry()
+    registry.register(plugin)
+    registry.register(RandomBoldPlugin(probability=0.5))
+    daemon = FancifierDaemon(
+        config=config,
+        registry=registry,
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=factory,
+    )
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+
+    client = clients["solo"]
+    await client.emit_draft(1, "hello world")
+    await client.emit_draft(2, "hello world")
+    await asyncio.sleep(0.1)
+    await client.emit(1, 10, "hello world")
+    await client.emit(2, 12, "hello world")
+    await asyncio.sleep(0.3)
+    await daemon.shutdown()
+    await runner
+
+    bold = RandomBoldPlugin(probability=0.5)
+    expected_10 = await bold.transform("HELLO WORLD", PluginContext(1, 10, dry_run=False))
+    expected_12 = await bold.transform("hello world", PluginContext(2, 12, dry_run=False))
+    # Выделение то же, что и без спекуляции: зерно берётся из настоящего message_id
+    assert sorted(client.edits) == [(1, 10, expected_10), (2, 12, expected_12)]
+    assert plugin.calls == ["hello world"]
+    metrics = daemon.accounts[0].metrics
+    assert metrics.counter("speculation.started") == 1
+    assert metrics.counter("speculation.hits") == 1
+
+
+@pytest.mark.asyncio
+async def test_latest_wins_cancels_hanging_llm_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    clients: dict[str, StubClient] = {}
+    started: list[str] = []
+    cancelled: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        text = json.loads(request.content)["messages"][-1]["content"]
+        started.append(text)
+        if "first" in text:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+        body = {"choices": [{"message": {"content": "second ✨"}}]}
+        return httpx.Response(200, json=body)
+
+    def factory(account: AccountConfig) -> StubClient:
+        clients[account.session_name] = StubClient(account)
+        return clients[account.session_name]
+
+    config = AppConfig(
+        chats=[ChatConfig(chat_id=1, title="A", plugin_order=["llm_rewrite"])],
+        accounts=[AccountConfig(session_name="solo")],
+    )
+    config.runtime.stats_interval_seconds = 0
+    provider = DeepSeekProvider(transport=httpx.MockTransport(handler))
+    registry = PluginRegistry()
+    registry.register(LlmRewritePlugin(provider=provider, llm_config=config.llm))
+    daemon = FancifierDaemon(
+        config=config,
+        registry=registry,
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=factory,
+    )
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+
+    client = clients["solo"]
+    await client.emit(1, 10, "first")
+    for _ in range(50):
+        if started:
+            break
+        await asyncio.sleep(0.01)
+    await client.emit(1, 11, "second")
+    for _ in range(50):
+        if client.edits:
+            break
+        await asyncio.sleep(0.01)
+    await daemon.shutdown()
+    await runner
+
+    assert len(started) == 2
+    assert len(cancelled) == 1 and "first" in cancelled[0]
+    assert client.edits == [(1, 11, "second ✨")]
+    assert daemon.accounts[0].metrics.counter("skips.superseded") == 1
+
+
+class _CpuBoundPlugin:
+    plugin_id = "cpu_heavy"
+    title = "CPU heavy"
+    execution = "cpu_bound"
+
+    def transform_sync(self, text: str, context: Any) -> str:
+        return text
+
+    async def transform(self, text: str, context: Any) -> str:
+        return text
+
+
+@pytest.mark.asyncio
+async def test_daemon_starts_pools_only_for_plugins_used_by_chats() -> None:
+    registry = _registry()
+    registry.register(_CpuBoundPlugin())
+    daemon = FancifierDaemon(
+        config=_config(),
+        registry=registry,
+        options=DaemonOptions(),
+        enable_hot_reload=False,
+        client_factory=StubClient,
+    )
+    runner = asyncio.create_task(daemon.run())
+    await asyncio.sleep(0.05)
+    process_pool = daemon.executors._process_pool
+    thread_pool = daemon.executors._thread_pool
+    await daemon.shutdown()
+    await runner
+
+    assert [plugin.plugin_id for plugin in daemon.snapshot.used_plugins()] == [
+        "every_second_upper"
+    ]
+    assert process_pool is None
+    assert thread_pool is None
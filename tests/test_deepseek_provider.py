@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from telethon_fancifier.config.schema import HttpClientConfig
+from telethon_fancifier.providers.base import LlmRequest
+from telethon_fancifier.providers.deepseek import DeepSeekProvider
+
+
+async def _serve(connections: list[int]) -> asyncio.Server:
+    """Минимальный HTTP/1.1 сервер с keep-alive, отвечающий как chat/completions."""
+    body = json.dumps({"choices": [{"message": {"content": "ok ✨"}}]}).encode()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connections.append(1)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.mark.asyncio
+async def test_provider_reuses_pooled_connection(monkeypatch: pytest.MonkeyPatch) -> None:
+    connections: list[int] = []
+    server = await _serve(connections)
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    monkeypatch.setenv("DEEPSEEK_BASE_URL", f"http://127.0.0.1:{port}")
+
+    provider = DeepSeekProvider(HttpClientConfig(idle_ping_seconds=0))
+    try:
+        await provider.start()
+        for text in ("a", "b", "c"):
+            assert await provider.rewrite(LlmRequest(text=text, chat_id=1)) == "ok ✨"
+    finally:
+        await provider.aclose()
+        server.close()
+        await server.wait_closed()
+
+    assert len(connections) == 1
+    assert provider.metrics.counter("http.warmups") == 1
+    assert provider.metrics.counter("http.connections_opened") == 1
+    assert provider.metrics.counter("http.connections_reused") == 3
+
+
+def _sse(*events: object) -> bytes:
+    lines = [f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in events]
+    return ("".join(lines) + "data: [DONE]\n\n").encode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("api_style", "body"),
+    [
+        (
+            "chat_completions",
+            _sse(
+                {"choices": [{"delta": {"role": "assistant"}}]},
+                {"choices": [{"delta": {"content": "При"}}]},
+                {"choices": [{"delta": {"content": "вет"}}]},
+            ),
+        ),
+        (
+            "responses",
+            _sse(
+                {"type": "response.created"},
+                {"type": "response.output_text.delta", "delta": "При"},
+                {"type": "response.output_text.delta", "delta": "вет"},
+                {"type": "response.completed"},
+            ),
+        ),
+    ],
+)
+async def test_provider_streams_partial_output(
+    api_style: str, body: bytes, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    sent: list[dict[str, object]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, content=body, headers={"Content-Type": "text/event-stream"})
+
+    provider = DeepSeekProvider(transport=httpx.MockTransport(handler))
+    partials: list[str] = []
+    try:
+        result = await provider.rewrite(
+            LlmRequest(text="hi", chat_id=1, api_style=api_style, on_partial=partials.append)
+        )
+    finally:
+        await provider.aclose()
+
+    assert result == "Привет"
+    assert partials == ["При", "Привет"]
+    assert sent[0]["stream"] is True
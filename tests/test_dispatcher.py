@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from telethon_fancifier.core.dispatcher import ChatDispatcher
+from telethon_fancifier.core.metrics import Metrics
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_keeps_per_chat_order_and_caps_concurrency() -> None:
+    metrics = Metrics()
+    dispatcher = ChatDispatcher(workers=2, queue_size=10, metrics=metrics)
+    order: list[tuple[int, int]] = []
+    active = 0
+    peak = 0
+
+    def make_job(chat_id: int, index: int):
+        async def job() -> None:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            order.append((chat_id, index))
+            active -= 1
+
+        return job
+
+    for index in range(3):
+        for chat_id in (1, 2, 3):
+            dispatcher.submit(chat_id, make_job(chat_id, index))
+
+    dispatcher.start()
+    while len(order) < 9:
+        await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert peak <= 2
+    for chat_id in (1, 2, 3):
+        assert [index for chat, index in order if chat == chat_id] == [0, 1, 2]
+    assert metrics.timing("dispatch.wait").count == 9
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sheds_oldest_job_on_overflow() -> None:
+    metrics = Metrics()
+    dispatcher = ChatDispatcher(workers=1, queue_size=2, metrics=metrics)
+    done: list[int] = []
+
+    def make_job(index: int):
+        async def job() -> None:
+            done.append(index)
+
+        return job
+
+    for index in range(4):
+        dispatcher.submit(1, make_job(index))
+    assert dispatcher.depth() == 2
+
+    dispatcher.start()
+    while dispatcher.depth():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert done == [2, 3]
+    assert metrics.counter("dispatch.shed") == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_latest_wins_cancels_running_job() -> None:
+    metrics = Metrics()
+    dispatcher = ChatDispatcher(workers=1, queue_size=5, metrics=metrics)
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+    finished: list[str] = []
+
+    async def slow() -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def fast() -> None:
+        finished.append("fast")
+
+    dispatcher.start()
+    dispatcher.submit(1, slow, latest_wins=True)
+    await asyncio.wait_for(started.wait(), 1)
+    dispatcher.submit(1, fast, latest_wins=True)
+    await asyncio.wait_for(cancelled.wait(), 1)
+    while not finished:
+        await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert finished == ["fast"]
+    assert metrics.counter("transforms.superseded") == 1
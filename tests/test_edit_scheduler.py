@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from telethon.errors import FloodWaitError, MessageNotModifiedError
+
+from telethon_fancifier.core.edit_scheduler import EditScheduler, TokenBucket
+from telethon_fancifier.core.metrics import Metrics
+
+
+def test_token_bucket_waits_after_burst() -> None:
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    bucket.take()
+    bucket.take()
+
+    assert 0.05 < bucket.wait_time() <= 0.1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_orders_by_deadline_and_drops_stale() -> None:
+    edited: list[int] = []
+
+    async def edit(chat_id: int, message_id: int, text: str) -> None:
+        edited.append(message_id)
+
+    metrics = Metrics()
+    scheduler = EditScheduler(edit, rate=100.0, burst=100, metrics=metrics)
+    now = time.monotonic()
+    submits = [
+        asyncio.ensure_future(scheduler.submit(1, 1, "late", now + 5)),
+        asyncio.ensure_future(scheduler.submit(2, 2, "urgent", now + 1)),
+        asyncio.ensure_future(scheduler.submit(3, 3, "stale", now - 1)),
+    ]
+    await asyncio.sleep(0)
+    scheduler.start()
+    results = await asyncio.gather(*submits)
+    await scheduler.stop()
+
+    assert results == [True, True, False]
+    assert edited == [2, 1]
+    assert metrics.counter("edits.dropped_stale") == 1
+    assert metrics.counter("edits.sent") == 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_retries_after_flood_wait() -> None:
+    calls = 0
+
+    async def edit(chat_id: int, message_id: int, text: str) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise FloodWaitError(request=None, capture=0)
+
+    metrics = Metrics()
+    scheduler = EditScheduler(edit, rate=100.0, burst=100, metrics=metrics)
+    scheduler.start()
+    result = await scheduler.submit(1, 1, "x", time.monotonic() + 5)
+    await scheduler.stop()
+
+    assert result is True
+    assert calls == 2
+    assert metrics.counter("edits.flood_wait") == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rejects_expiring_edit_during_flood_wait() -> None:
+    calls = 0
+
+    async def edit(chat_id: int, message_id: int, text: str) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise FloodWaitError(request=None, capture=3)
+
+    metrics = Metrics()
+    scheduler = EditScheduler(edit, rate=100.0, burst=100, metrics=metrics)
+    scheduler.start()
+    paused = asyncio.ensure_future(scheduler.submit(1, 1, "x", time.monotonic() + 60))
+    while not metrics.counter("edits.flood_wait"):
+        await asyncio.sleep(0.01)
+
+    started = time.monotonic()
+    result = await scheduler.submit(2, 2, "y", time.monotonic() + 0.2)
+    elapsed = time.monotonic() - started
+    await scheduler.stop()
+
+    assert result is False
+    assert elapsed < 1
+    assert calls == 1
+    assert metrics.counter("edits.dropped_stale") == 1
+    with pytest.raises(asyncio.CancelledError):
+        await paused
+
+
+@pytest.mark.asyncio
+async def test_scheduler_treats_not_modified_as_done() -> None:
+    async def edit(chat_id: int, message_id: int, text: str) -> None:
+        raise MessageNotModifiedError(request=None)
+
+    metrics = Metrics()
+    scheduler = EditScheduler(edit, rate=100.0, burst=100, metrics=metrics)
+    scheduler.start()
+    result = await scheduler.submit(1, 1, "x")
+    await scheduler.stop()
+
+    assert result is True
+    assert metrics.counter("edits.not_modified") == 1
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from telethon_fancifier.providers.base import LlmProviderError, LlmRequest
+from telethon_fancifier.providers.deepseek import DeepSeekProvider
+from telethon_fancifier.providers.hedging import HedgingProvider, percentile
+
+
+def _stub_endpoint(delay: float, answer: str, calls: list[str]) -> DeepSeekProvider:
+    """DeepSeekProvider поверх локальной заглушки API с заданной задержкой ответа."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(answer)
+        await asyncio.sleep(delay)
+        body = {"choices": [{"message": {"content": answer}}]}
+        return httpx.Response(200, content=json.dumps(body).encode())
+
+    return DeepSeekProvider(transport=httpx.MockTransport(handler), base_url=f"http://{answer}")
+
+
+class FailingBackend:
+    async def complete(self, request: LlmRequest) -> str:
+        raise LlmProviderError("HTTP 503", retryable=True)
+
+
+def test_percentile_picks_upper_sample() -> None:
+    assert percentile([0.1, 0.2, 0.3, 0.4], 50) == 0.2
+    assert percentile([0.1, 0.2, 0.3, 0.4], 95) == 0.4
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_after_delay_and_cancels_slow_primary(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    calls: list[str] = []
+    slow = _stub_endpoint(1.0, "slow", calls)
+    fast = _stub_endpoint(0.01, "fast", calls)
+    provider = HedgingProvider([slow, fast], initial_delay=0.05)
+
+    started = asyncio.get_running_loop().time()
+    result = await provider.rewrite(LlmRequest(text="hi", chat_id=1))
+    elapsed = asyncio.get_running_loop().time() - started
+    await provider.aclose()
+
+    assert result == "fast"
+    assert elapsed < 0.5
+    assert calls == ["slow", "fast"]
+    counters = provider.metrics.snapshot()["counters"]
+    assert counters["hedging.hedged"] == 1  # type: ignore[index]
+    assert counters["hedging.wins.1"] == 1  # type: ignore[index]
+    assert counters["hedging.cancelled"] == 1  # type: ignore[index]
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_needs_no_hedge_and_errors_fail_over(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    calls: list[str] = []
+    provider = HedgingProvider(
+        [_stub_endpoint(0.0, "primary", calls), _stub_endpoint(0.0, "backup", calls)],
+        initial_delay=0.5,
+    )
+    assert await provider.complete(LlmRequest(text="hi", chat_id=1)) == "primary"
+    assert calls == ["primary"]
+    await provider.aclose()
+
+    failover = HedgingProvider([FailingBackend(), _stub_endpoint(0.0, "backup", calls)])
+    assert await failover.complete(LlmRequest(text="hi", chat_id=1)) == "backup"
+
+    with pytest.raises(LlmProviderError):
+        await HedgingProvider([FailingBackend(), FailingBackend()]).complete(
+            LlmRequest(text="hi", chat_id=1)
+        )
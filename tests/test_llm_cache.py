@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from telethon_fancifier.providers.base import LlmProviderError, LlmRequest
+from telethon_fancifier.providers.cache import CachingProvider
+
+
+class CountingBackend:
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.fail = fail
+
+    async def complete(self, request: LlmRequest) -> str:
+        self.calls += 1
+        if self.fail:
+            raise LlmProviderError("сбой", retryable=True)
+        return f"{request.text} ✨"
+
+
+def _request(text: str, temperature: float | None = 0.0, prompt: str = "sys") -> LlmRequest:
+    return LlmRequest(text=text, chat_id=1, system_prompt=prompt, temperature=temperature)
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_only_deterministic_identical_requests() -> None:
+    backend = CountingBackend()
+    provider = CachingProvider(backend, provider_name="deepseek", max_entries=2)
+
+    assert await provider.rewrite(_request("ok")) == "ok ✨"
+    assert await provider.rewrite(_request("ok")) == "ok ✨"
+    await provider.rewrite(_request("ok", prompt="other"))
+    await provider.rewrite(_request("ok", temperature=0.7))
+    await provider.rewrite(_request("ok", temperature=0.7))
+
+    assert backend.calls == 4
+    stats = provider.stats()["cache"]
+    assert stats["counters"] == {"cache.misses": 2, "cache.hits": 1, "cache.bypass": 2}  # type: ignore[index]
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_lru_and_skips_failures() -> None:
+    backend = CountingBackend()
+    provider = CachingProvider(backend, provider_name="deepseek", max_entries=2)
+    for text in ("a", "b", "a", "c", "a", "b"):
+        await provider.rewrite(_request(text))
+    # "b" вытеснен при добавлении "c", "a" оставался самым свежим
+    assert backend.calls == 4
+
+    failing = CachingProvider(CountingBackend(fail=True), provider_name="deepseek")
+    assert await failing.rewrite(_request("ok")) == "ok"
+    with pytest.raises(LlmProviderError):
+        await failing.complete(_request("ok"))
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart_in_sqlite(tmp_path: Path) -> None:
+    db_path = tmp_path / "cache.sqlite3"
+    first = CachingProvider(CountingBackend(), provider_name="deepseek", db_path=db_path)
+    await first.rewrite(_request("спасибо"))
+    await first.aclose()
+
+    backend = CountingBackend()
+    second = CachingProvider(backend, provider_name="deepseek", db_path=db_path)
+    assert await second.rewrite(_request("спасибо")) == "спасибо ✨"
+    assert backend.calls == 0
+    await second.aclose()
+
+    expired = CachingProvider(backend, provider_name="deepseek", ttl=-1, db_path=db_path)
+    await expired.rewrite(_request("спасибо"))
+    assert backend.calls == 1
+    await expired.aclose()
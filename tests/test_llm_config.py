@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 import pytest
 
-from telethon_fancifier.config.schema import LlmConfig, LlmPromptConfig
+from telethon_fancifier.config.schema import AppConfig, LlmConfig, LlmPromptConfig
+from telethon_fancifier.config.store import ConfigStore
 from telethon_fancifier.plugins.base import PluginContext
 from telethon_fancifier.plugins.llm_rewrite import LlmRewritePlugin
 from telethon_fancifier.providers.base import LlmRequest
@@ -55,3 +58,35 @@ async def test_llm_rewrite_passes_prompt_settings_to_provider() -> None:
     assert provider.last_request.temperature == 0.6
     assert provider.last_request.model == "deepseek-chat"
     assert provider.last_request.api_style == "responses"
+
+
+@pytest.mark.asyncio
+async def test_llm_rewrite_follows_config_file_without_reading_it_per_message(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = ConfigStore(tmp_path / "config.json")
+    config = AppConfig()
+    store.save(config)
+    loads: list[int] = []
+    original_load = store.load
+
+    def counting_load() -> AppConfig:
+        loads.append(1)
+        return original_load()
+
+    monkeypatch.setattr(store, "load", counting_load)
+    provider = CaptureProvider()
+    plugin = LlmRewritePlugin(provider=provider, config_store=store, revalidate_interval=0.0)
+    context = PluginContext(chat_id=1, message_id=1, dry_run=True)
+
+    await plugin.transform("a", context)
+    await plugin.transform("b", context)
+    assert len(loads) == 1
+
+    config.llm.model = "deepseek-reasoner"
+    store.save(config)
+    await plugin.transform("c", context)
+
+    assert len(loads) == 2
+    assert provider.last_request is not None
+    assert provider.last_request.model == "deepseek-reasoner"
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import pytest
 
+from telethon_fancifier.cli import _run_preview
 from telethon_fancifier.core.errors import AppError
 from telethon_fancifier.core.llm_tools import preview_llm_response
+from telethon_fancifier.plugins.base import PluginContext
+from telethon_fancifier.plugins.registry import PluginRegistry
 from telethon_fancifier.providers.base import LlmRequest
 
 
@@ -26,3 +29,27 @@ async def test_preview_llm_response_returns_provider_output() -> None:
 async def test_preview_llm_response_rejects_empty_text() -> None:
     with pytest.raises(AppError):
         await preview_llm_response(text="   ", chat_id=1, provider=FakeProvider())
+
+
+class ClosingPlugin:
+    plugin_id = "closing"
+    title = "Closing"
+
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def transform(self, text: str, context: PluginContext) -> str:
+        return text.upper()
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_pipeline_preview_closes_plugins() -> None:
+    plugin = ClosingPlugin()
+    registry = PluginRegistry()
+    registry.register(plugin)
+
+    assert await _run_preview(registry, ["closing"], "привет", chat_id=1) == "ПРИВЕТ"
+    assert plugin.closed
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from telethon_fancifier.config.schema import AppConfig, ChatConfig
+from telethon_fancifier.core.memo import PluginMemo
+from telethon_fancifier.core.pipeline import compile_snapshot, run_pipeline
+from telethon_fancifier.plugins.base import PluginContext
+from telethon_fancifier.plugins.every_second_upper import EverySecondUpperPlugin
+from telethon_fancifier.plugins.random_bold import RandomBoldPlugin
+from telethon_fancifier.plugins.registry import PluginRegistry
+
+
+def _registry() -> PluginRegistry:
+    registry = PluginRegistry()
+    registry.register(EverySecondUpperPlugin())
+    registry.register(RandomBoldPlugin())
+    return registry
+
+
+def test_snapshot_resolves_plugins_per_chat() -> None:
+    registry = _registry()
+    config = AppConfig(
+        chats=[
+            ChatConfig(chat_id=1, title="A", plugin_order=["random_bold", "every_second_upper"]),
+            ChatConfig(chat_id=2, title="B", plugin_order=[]),
+        ]
+    )
+
+    snapshot = compile_snapshot(config, registry, version=3)
+
+    pipeline = snapshot.get(1)
+    assert snapshot.version == 3
+    assert pipeline is not None
+    assert pipeline.plugin_ids == ("random_bold", "every_second_upper")
+    assert pipeline.plugins[0] is registry.get("random_bold")
+    assert snapshot.get(2) is None
+    assert snapshot.get(3) is None
+
+
+def test_snapshot_skips_chat_with_unknown_plugin() -> None:
+    config = AppConfig(
+        chats=[
+            ChatConfig(chat_id=1, title="A", plugin_order=["missing"]),
+            ChatConfig(chat_id=2, title="B", plugin_order=["every_second_upper"]),
+        ]
+    )
+
+    snapshot = compile_snapshot(config, _registry(), version=1)
+
+    assert snapshot.get(1) is None
+    assert snapshot.get(2) is not None
+
+
+class FailingPlugin:
+    plugin_id = "failing"
+    title = "Failing"
+
+    async def transform(self, text: str, context: PluginContext) -> str:
+        raise RuntimeError("boom")
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_applies_plugins_in_order() -> None:
+    config = AppConfig(chats=[ChatConfig(chat_id=1, title="A", plugin_order=["every_second_upper"])])
+    pipeline = compile_snapshot(config, _registry(), version=1).get(1)
+    assert pipeline is not None
+
+    result = await run_pipeline(
+        pipeline,
+        "привет",
+        PluginContext(chat_id=1, message_id=1, dry_run=True, deadline=time.monotonic() + 5),
+    )
+
+    assert result.completed
+    assert result.text == "пРиВеТ"
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_stops_after_deadline() -> None:
+    config = AppConfig(chats=[ChatConfig(chat_id=1, title="A", plugin_order=["every_second_upper"])])
+    pipeline = compile_snapshot(config, _registry(), version=1).get(1)
+    assert pipeline is not None
+
+    result = await run_pipeline(
+        pipeline,
+        "привет",
+        PluginContext(chat_id=1, message_id=1, dry_run=True, deadline=time.monotonic() - 1),
+    )
+
+    assert result.skip_reason == "deadline"
+    assert result.text == "привет"
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_reports_plugin_error() -> None:
+    registry = _registry()
+    registry.register(FailingPlugin())
+    config = AppConfig(chats=[ChatConfig(chat_id=1, title="A", plugin_order=["failing"])])
+    pipeline = compile_snapshot(config, registry, version=1).get(1)
+    assert pipeline is not None
+
+    result = await run_pipeline(pipeline, "x", PluginContext(chat_id=1, message_id=1, dry_run=True))
+
+    assert result.skip_reason == "plugin_error"
+
+
+class CountingPurePlugin:
+    title = "Counting"
+    pure = True
+
+    def __init__(self, plugin_id: str, suffix: str) -> None:
+        self.plugin_id = plugin_id
+        self._suffix = suffix
+        self.calls = 0
+
+    async def transform(self, text: str, context: PluginContext) -> str:
+        self.calls += 1
+        return text + self._suffix
+
+
+class CountingImpurePlugin(CountingPurePlugin):
+    pure = False
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_memoizes_pure_prefix_and_plugins() -> None:
+    first = CountingPurePlugin("first", "1")
+    second = CountingPurePlugin("second", "2")
+    impure = CountingImpurePlugin("impure", "!")
+    registry = PluginRegistry()
+    for plugin in (first, second, impure):
+        registry.register(plugin)
+    config = AppConfig(
+        chats=[
+            ChatConfig(chat_id=1, title="A", plugin_order=["first", "second", "impure"]),
+            ChatConfig(chat_id=2, title="B", plugin_order=["impure", "second"]),
+        ]
+    )
+    snapshot = compile_snapshot(config, registry, version=1)
+    memo = PluginMemo(max_entries=16)
+    context = PluginContext(chat_id=1, message_id=1, dry_run=True)
+
+    for _ in range(3):
+        result = await run_pipeline(snapshot.pipelines[1], "x", context, memo=memo)
+        assert result.text == "x12!"
+    for _ in range(2):
+        result = await run_pipeline(snapshot.pipelines[2], "x", context, memo=memo)
+        assert result.text == "x!2"
+
+    assert (first.calls, second.calls, impure.calls) == (1, 2, 5)
+    stats = memo.stats()["plugins"]
+    assert stats["first"] == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}  # type: ignore[index]
+    assert stats["second"]["hits"] == 3  # type: ignore[index]
+    assert "impure" not in stats  # type: ignore[operator]
+
+
+def test_plugin_memo_evicts_least_recently_used() -> None:
+    memo = PluginMemo(max_entries=2)
+    memo.put((("a",), "1"), "A1")
+    memo.put((("a",), "2"), "A2")
+    assert memo.get((("a",), "1")) == "A1"
+    memo.put((("a",), "3"), "A3")
+
+    assert memo.get((("a",), "2")) is None
+    assert memo.get((("a",), "1")) == "A1"
+    assert memo.evicted == 1
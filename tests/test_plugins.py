@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+from pathlib import Path
 
-from telethon_fancifier.plugins.base import PluginContext
+import pytest
+
+from telethon_fancifier.core import executors as executors_module
+from telethon_fancifier.core.executors import PluginExecutors
+from telethon_fancifier.core.metrics import Metrics
+from telethon_fancifier.plugins.base import PluginContext, plugin_execution
 from telethon_fancifier.plugins.every_second_upper import EverySecondUpperPlugin
-from telethon_fancifier.plugins.random_bold import RandomBoldPlugin
+from telethon_fancifier.plugins.random_bold import RandomBoldPlugin, message_seed
 
 
 def test_every_second_upper() -> None:
@@ -21,3 +28,91 @@ def test_random_bold_escapes_markdown() -> None:
         plugin.transform("a_b", PluginContext(chat_id=1, message_id=1, dry_run=True))
     )
     assert "\\_" in transformed
+
+
+def test_random_bold_is_reproducible_per_message(caplog: pytest.LogCaptureFixture) -> None:
+    plugin = RandomBoldPlugin(probability=0.5)
+    text = "Привет, как дела? Всё хорошо." * 4
+
+    def render(plugin: RandomBoldPlugin, message_id: int, dry_run: bool = False) -> str:
+        context = PluginContext(chat_id=1, message_id=message_id, dry_run=dry_run)
+        return asyncio.run(plugin.transform(text, context))
+
+    with caplog.at_level(logging.INFO, logger="telethon_fancifier.plugins.random_bold"):
+        first = render(plugin, 10, dry_run=True)
+
+    assert render(plugin, 10) == first
+    assert render(RandomBoldPlugin(probability=0.5), 10) == first
+    assert render(plugin, 11) != first
+    assert render(RandomBoldPlugin(probability=0.5, seed=7), 10) != first
+    assert "*" in first
+    assert f"seed={message_seed(1, 10)}" in caplog.text
+
+
+class BlockingUpperPlugin:
+    plugin_id = "blocking_upper"
+    title = "Blocking upper"
+    execution = "blocking"
+
+    def transform_sync(self, text: str, context: PluginContext) -> str:
+        return text.upper()
+
+    async def transform(self, text: str, context: PluginContext) -> str:
+        raise AssertionError("должен выполняться в пуле потоков")
+
+
+def test_blocking_plugin_runs_in_thread_pool() -> None:
+    metrics = Metrics()
+    executors = PluginExecutors(threads=1, processes=0, metrics=metrics)
+    plugin = BlockingUpperPlugin()
+
+    assert plugin_execution(plugin) == "blocking"
+    try:
+        transformed = asyncio.run(
+            executors.run(plugin, "abc", PluginContext(chat_id=1, message_id=1, dry_run=True))
+        )
+    finally:
+        executors.shutdown()
+
+    assert transformed == "ABC"
+    assert metrics.timing("executor.blocking_upper").count == 1
+
+
+_EXTERNAL_PLUGIN = """
+class Plugin:
+    plugin_id = "external"
+    title = "External"
+    execution = "cpu_bound"
+
+    def transform_sync(self, text, context):
+        return text + "{suffix}"
+
+
+def get_plugin():
+    return Plugin()
+"""
+
+
+def test_process_worker_reloads_changed_plugin_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(executors_module, "_PROCESS_PLUGINS", {})
+    path = tmp_path / "external.py"
+    context = PluginContext(chat_id=1, message_id=1, dry_run=True)
+
+    path.write_text(_EXTERNAL_PLUGIN.format(suffix="!"), encoding="utf-8")
+    version = executors_module._source_version(str(path))
+    assert executors_module._run_in_process(str(path), version, "external", "a", context) == "a!"
+
+    path.write_text(_EXTERNAL_PLUGIN.format(suffix="?!"), encoding="utf-8")
+    new_version = executors_module._source_version(str(path))
+    assert new_version != version
+    assert executors_module._run_in_process(str(path), version, "external", "a", context) == "a!"
+    assert (
+        executors_module._run_in_process(str(path), new_version, "external", "a", context)
+        == "a?!"
+    )
+
+
+def test_plugin_without_transform_sync_stays_async() -> None:
+    assert plugin_execution(RandomBoldPlugin()) == "async"
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from telethon_fancifier.providers.base import LlmProviderError, LlmRequest
+from telethon_fancifier.providers.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    ResilientProvider,
+)
+
+
+class ScriptedBackend:
+    """Отвечает по сценарию: исключение или строка на каждый вызов."""
+
+    def __init__(self, *outcomes: str | LlmProviderError) -> None:
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def complete(self, request: LlmRequest) -> str:
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, LlmProviderError):
+            raise outcome
+        return outcome
+
+
+def _retryable() -> LlmProviderError:
+    return LlmProviderError("HTTP 503", retryable=True)
+
+
+@pytest.mark.asyncio
+async def test_retries_retryable_errors_but_not_permanent_ones() -> None:
+    backend = ScriptedBackend(_retryable(), _retryable(), "готово")
+    provider = ResilientProvider(backend, backoff_base=0.001)
+
+    assert await provider.complete(LlmRequest(text="hi", chat_id=1, timeout=5)) == "готово"
+    assert backend.calls == 3
+    assert provider.metrics.counter("resilience.retries") == 2
+
+    permanent = ScriptedBackend(LlmProviderError("HTTP 400"))
+    provider = ResilientProvider(permanent, backoff_base=0.001)
+    with pytest.raises(LlmProviderError):
+        await provider.complete(LlmRequest(text="hi", chat_id=1))
+    assert permanent.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_stops_when_budget_is_spent() -> None:
+    backend = ScriptedBackend(_retryable(), _retryable())
+    provider = ResilientProvider(backend, backoff_base=1.0, backoff_max=1.0)
+
+    # Бюджета не хватит даже на самую короткую паузу перед повтором
+    assert await provider.rewrite(LlmRequest(text="hi", chat_id=1, timeout=0.0001)) == "hi"
+    assert backend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers_through_probe() -> None:
+    backend = ScriptedBackend(*[_retryable() for _ in range(3)])
+    provider = ResilientProvider(
+        backend, max_attempts=1, failure_threshold=3, open_seconds=0.05
+    )
+    request = LlmRequest(text="hi", chat_id=1)
+
+    for _ in range(3):
+        assert await provider.rewrite(request) == "hi"
+    assert provider.breaker.state == STATE_OPEN
+
+    assert await provider.rewrite(request) == "hi"
+    assert backend.calls == 3
+    assert provider.metrics.counter("resilience.short_circuited") == 1
+
+    await asyncio.sleep(0.06)
+    assert provider.breaker.allow()
+    assert provider.breaker.state == STATE_HALF_OPEN
+    provider.breaker.release()
+
+    assert await provider.rewrite(request) == "ok"
+    assert provider.breaker.state == STATE_CLOSED
+    assert provider.metrics.counter("breaker.open") == 1
+    assert provider.metrics.counter("breaker.closed") == 1
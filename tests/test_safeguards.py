@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import time
 from datetime import UTC, datetime, timedelta
 
-from telethon_fancifier.core.safeguards import can_edit_last_message
+from telethon_fancifier.core.safeguards import can_edit_last_message, edit_deadline
 
 
 def test_allows_last_message_within_window() -> None:
@@ -21,3 +22,15 @@ def test_rejects_old_message() -> None:
     date = datetime.now(UTC) - timedelta(seconds=20)
     result = can_edit_last_message(10, 10, date, max_age_seconds=10)
     assert not result.ok
+
+
+def test_rejected_result_carries_reason_code() -> None:
+    date = datetime.now(UTC) - timedelta(seconds=20)
+    assert can_edit_last_message(10, 10, date, max_age_seconds=10).code == "too_old"
+    assert can_edit_last_message(10, 11, date, max_age_seconds=10).code == "not_last"
+
+
+def test_edit_deadline_counts_from_message_date() -> None:
+    date = datetime.now(UTC) - timedelta(seconds=4)
+    remaining = edit_deadline(date, max_age_seconds=10) - time.monotonic()
+    assert 5.5 < remaining <= 6.0
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from telethon_fancifier.config.schema import ChatConfig
+import pytest
+
+from telethon_fancifier.config.schema import AppConfig, ChatConfig
+from telethon_fancifier.plugins import build_builtin_registry
+from telethon_fancifier.ui import settings_cli
 from telethon_fancifier.ui.settings_cli import merge_chat_configs
 
 
@@ -32,3 +36,24 @@ def test_merge_appends_new_chat() -> None:
 
     assert [c.chat_id for c in merged] == [1, 3]
     assert merged[1].plugin_order == ["every_second_upper"]
+
+
+@pytest.mark.asyncio
+async def test_wizard_keeps_chat_settings_it_does_not_ask_about(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def fetch_writable_chats() -> list[tuple[int, str]]:
+        return [(1, "A")]
+
+    answers = iter(["1", "1"])
+    monkeypatch.setattr(settings_cli, "fetch_writable_chats", fetch_writable_chats)
+    monkeypatch.setattr("builtins.input", lambda prompt: next(answers))
+    registry = build_builtin_registry()
+    config = AppConfig(
+        chats=[ChatConfig(chat_id=1, title="A", plugin_order=["random_bold"], latest_wins=False)]
+    )
+
+    updated = await settings_cli._run_add_or_edit_chats_wizard(config, registry)
+
+    assert updated.chats[0].plugin_order == [registry.all_ids()[0]]
+    assert updated.chats[0].latest_wins is False
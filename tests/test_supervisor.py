@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from telethon_fancifier.config.schema import AccountConfig, AppConfig, ChatConfig
+from telethon_fancifier.core.daemon import DaemonOptions
+from telethon_fancifier.core.supervisor import ShardSupervisor, shard_accounts
+
+
+class StubClient:
+    """Клиент без сети: подключается мгновенно и ждёт disconnect()."""
+
+    def __init__(self, account: AccountConfig) -> None:
+        self._disconnected = asyncio.Event()
+
+    def add_event_handler(self, callback: Any, event: Any) -> None:
+        return None
+
+    def remove_event_handler(self, callback: Any, event: Any) -> None:
+        return None
+
+    async def start(self) -> None:
+        return None
+
+    async def run_until_disconnected(self) -> None:
+        await self._disconnected.wait()
+
+    def is_connected(self) -> bool:
+        return not self._disconnected.is_set()
+
+    async def disconnect(self) -> None:
+        self._disconnected.set()
+
+
+def stub_client_factory(account: AccountConfig) -> StubClient:
+    return StubClient(account)
+
+
+def test_shard_accounts_round_robin() -> None:
+    accounts = [AccountConfig(session_name=name) for name in "abcde"]
+
+    shards = shard_accounts(accounts, 2)
+
+    assert [[a.session_name for a in shard] for shard in shards] == [["a", "c", "e"], ["b", "d"]]
+    assert len(shard_accounts(accounts[:1], 4)) == 1
+
+
+async def _wait_for(predicate: Any, supervisor: ShardSupervisor, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        supervisor.collect_stats()
+        supervisor.check_workers()
+        if predicate():
+            return
+        await asyncio.sleep(0.1)
+    raise AssertionError("условие не выполнилось вовремя")
+
+
+@pytest.mark.asyncio
+async def test_supervisor_restarts_workers_and_broadcasts_reload(tmp_path: Path) -> None:
+    config = AppConfig(
+        chats=[ChatConfig(chat_id=1, title="A", plugin_order=["every_second_upper"])],
+        accounts=[AccountConfig(session_name=name) for name in ("a", "b", "c")],
+    )
+    config.runtime.stats_interval_seconds = 0.1
+    config.runtime.executor_processes = 0
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(asdict(config)), encoding="utf-8")
+
+    supervisor = ShardSupervisor(
+        accounts=config.accounts,
+        workers=2,
+        options=DaemonOptions(dry_run=True),
+        config_path=config_path,
+        enable_hot_reload=False,
+        client_factory=stub_client_factory,
+    )
+    supervisor.start_workers()
+    try:
+        def workers() -> dict[int, Any]:
+            return supervisor.stats()["workers"]  # type: ignore[return-value]
+
+        await _wait_for(lambda: all(w["stats"] for w in workers().values()), supervisor)
+        assert sorted(workers()[0]["stats"]["accounts"]) == ["a", "c"]
+
+        config.chats.append(ChatConfig(chat_id=2, title="B", plugin_order=["random_bold"]))
+        config_path.write_text(json.dumps(asdict(config)), encoding="utf-8")
+        supervisor.broadcast_reload()
+
+        def reloaded() -> bool:
+            return all(
+                w["stats"]["daemon"]["counters"].get("config.reloads", 0) >= 1
+                for w in workers().values()
+            )
+
+        await _wait_for(reloaded, supervisor)
+
+        first_pid = workers()[0]["pid"]
+        supervisor._slots[0].process.kill()  # type: ignore[union-attr]
+        await _wait_for(
+            lambda: workers()[0]["restarts"] == 1
+            and workers()[0]["alive"]
+            and workers()[0]["pid"] != first_pid,
+            supervisor,
+        )
+    finally:
+        await supervisor.stop()
+
+    assert not any(w["alive"] for w in workers().values())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from telethon_fancifier.core.text_kernels import (
+    MDV2_SPECIAL_CHARS,
+    alternate_case,
+    bold_letters,
+    escape_markdown_v2,
+    pick_table,
+)
+
+SAMPLES = [
+    "",
+    "привет",
+    "Hello, world! 12:30 — встречаемся_у входа.",
+    "straße ΟΔΟΣ x² Ⅻ",
+    "emoji 🙂 и i̇ combining",
+    "snake_case and CAPS",
+    "*bold* [link](https://example.com) `code` >quote #tag",
+]
+
+
+def _escape_reference(text: str) -> str:
+    return "".join("\\" + ch if ch in MDV2_SPECIAL_CHARS else ch for ch in text)
+
+
+def _alternate_case_reference(text: str) -> str:
+    chars: list[str] = []
+    letter_index = 0
+    for ch in text:
+        if ch.isalpha():
+            chars.append(ch.upper() if letter_index % 2 else ch.lower())
+            letter_index += 1
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def _bold_reference(text: str, picks: bytes) -> str:
+    return "".join(
+        f"*{ch}*" if picks[index] and ch.isalpha() else ch for index, ch in enumerate(text)
+    )
+
+
+def _check_against_reference(text: str) -> None:
+    assert escape_markdown_v2(text) == _escape_reference(text)
+    assert alternate_case(text) == _alternate_case_reference(text)
+    picks = bytes(index % 3 == 0 for index in range(len(text)))
+    assert bold_letters(text, picks) == _bold_reference(text, picks)
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_kernels_match_per_character_reference(text: str) -> None:
+    _check_against_reference(text)
+    # Повтор проверяет ядра на длинном тексте
+    _check_against_reference(text * 40)
+
+
+def test_kernels_match_reference_on_random_texts() -> None:
+    rng = random.Random(7)
+    alphabets = ["abcXYZабвЖЯ .,", "abcXYZабвЖЯß Σ²_-.!*0189 🙂\n"]
+    for _ in range(300):
+        alphabet = rng.choice(alphabets)
+        length = rng.choice([rng.randint(0, 60), rng.randint(100, 600)])
+        _check_against_reference("".join(rng.choice(alphabet) for _ in range(length)))
+
+
+def test_alternate_case_keeps_non_letters_in_place() -> None:
+    assert alternate_case("привет, мир 42") == "пРиВеТ, мИр 42"
+
+
+def test_pick_table_probability() -> None:
+    table = pick_table(0.25)
+
+    assert sum(table) == 64
+    assert pick_table(0.0) == bytes(256)
+    assert sum(pick_table(1.0)) == 256